@@ -0,0 +1,188 @@
+"""
+Compact binary character format (.M20b)
+
+Layout (all integers little-endian):
+    magic        4 bytes  b"M20B"
+    version      u8
+    flags        u8       bit 0: core traits packed
+    counts       4 x u16  attribute, ability, sphere, background ids stored
+    summary      u32 length + compact JSON of the listing summary
+    ratings      one byte per trait id, 0xFF = not present
+    core         5 x i16 (arete, willpower, willpower_current, quintessence,
+                 paradox) + 3 x i32 (experience_total, experience_spent,
+                 freebie_points_spent), when flag bit 0 is set
+    rest         u32 length + zlib-compressed compact JSON of every other field
+
+Rating vectors are interned against traits.py, so a sheet costs roughly a
+hundred bytes plus its free text. Anything that does not fit the packed
+layout (unknown traits, out-of-range values) is kept in the rest block, so
+conversion is lossless in both directions.
+"""
+
+import struct
+import zlib
+from . import canonical
+from .traits import ATTRIBUTE_IDS, ABILITY_IDS, SPHERE_IDS, BACKGROUND_IDS
+
+
+MAGIC = b"M20B"
+FORMAT_VERSION = 1
+BINARY_EXTENSION = ".M20b"
+
+FLAG_CORE_PACKED = 0x01
+
+ABSENT = 0xFF
+
+_HEADER = struct.Struct("<4sBB4H")
+_LENGTH = struct.Struct("<I")
+_CORE = struct.Struct("<5h3i")
+
+# Dict fields stored as rating vectors, with their id tables
+VECTOR_FIELDS = (
+    ("attributes", ATTRIBUTE_IDS),
+    ("abilities", ABILITY_IDS),
+    ("spheres", SPHERE_IDS),
+    ("backgrounds", BACKGROUND_IDS),
+)
+
+CORE_FIELDS = ("arete", "willpower", "willpower_current", "quintessence", "paradox",
+               "experience_total", "experience_spent", "freebie_points_spent")
+
+EXTRA_KEY = "_extra_ratings"
+
+
+class BinaryFormatError(ValueError):
+    """Raised when a .M20b file is malformed or from a newer version."""
+
+
+def _is_packable(value, low: int, high: int) -> bool:
+    return type(value) is int and low <= value <= high
+
+
+def _pack_core(data: dict) -> bytes:
+    """Pack the core trait and XP integers, or return b"" if they don't fit."""
+    values = [data.get(key) for key in CORE_FIELDS]
+    if not all(_is_packable(v, -0x8000, 0x7FFF) for v in values[:5]):
+        return b""
+    if not all(_is_packable(v, -0x80000000, 0x7FFFFFFF) for v in values[5:]):
+        return b""
+    return _CORE.pack(*values)
+
+
+def encode(data: dict, summary: dict) -> bytes:
+    """Encode a Character.to_dict() result and its summary as .M20b bytes."""
+    # Summary fields are stored once, in the summary block
+    rest = dict(data)
+    for key in summary:
+        if key not in CORE_FIELDS and rest.get(key) == summary[key]:
+            del rest[key]
+    
+    ratings = bytearray()
+    extra = {}
+    for field_name, ids in VECTOR_FIELDS:
+        values = rest.pop(field_name, {})
+        leftovers = dict(values)
+        for name in ids:
+            value = leftovers.get(name)
+            if _is_packable(value, 0, ABSENT - 1):
+                ratings.append(value)
+                del leftovers[name]
+            else:
+                ratings.append(ABSENT)
+        # Anything left is outside the id tables or the packable range
+        if leftovers:
+            extra[field_name] = leftovers
+    if extra:
+        rest[EXTRA_KEY] = extra
+    
+    core = _pack_core(rest)
+    flags = 0
+    if core:
+        flags |= FLAG_CORE_PACKED
+        for key in CORE_FIELDS:
+            del rest[key]
+    
+    summary_json = canonical.dumps(summary)
+    rest_json = canonical.dumps(rest)
+    rest_blob = zlib.compress(rest_json)
+    
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, flags,
+                          *(len(ids) for _, ids in VECTOR_FIELDS))
+    return b"".join([
+        header,
+        _LENGTH.pack(len(summary_json)), summary_json,
+        bytes(ratings),
+        core,
+        _LENGTH.pack(len(rest_blob)), rest_blob,
+    ])
+
+
+def _read_header(blob: bytes) -> tuple[int, tuple, int]:
+    """Validate the header. Returns (flags, id counts, offset after header)."""
+    if len(blob) < _HEADER.size:
+        raise BinaryFormatError("File is too short to be a .M20b character")
+    magic, version, flags, *counts = _HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise BinaryFormatError("Not a .M20b character file")
+    if version > FORMAT_VERSION:
+        raise BinaryFormatError(f"Unsupported .M20b version {version}")
+    for count, (field_name, ids) in zip(counts, VECTOR_FIELDS):
+        if count > len(ids):
+            raise BinaryFormatError(f"File lists more {field_name} than this version knows")
+    return flags, tuple(counts), _HEADER.size
+
+
+def _read_block(blob: bytes, offset: int) -> tuple[bytes, int]:
+    try:
+        (length,) = _LENGTH.unpack_from(blob, offset)
+    except struct.error as e:
+        raise BinaryFormatError("Truncated .M20b file") from e
+    offset += _LENGTH.size
+    block = blob[offset:offset + length]
+    if len(block) != length:
+        raise BinaryFormatError("Truncated .M20b file")
+    return block, offset + length
+
+
+def decode_summary(blob: bytes) -> dict:
+    """Decode only the listing summary from the head of .M20b bytes."""
+    _, _, offset = _read_header(blob)
+    summary_json, _ = _read_block(blob, offset)
+    return canonical.loads(summary_json)
+
+
+def decode(blob: bytes) -> dict:
+    """Decode .M20b bytes back into a Character.to_dict()-style dict."""
+    flags, counts, offset = _read_header(blob)
+    summary_json, offset = _read_block(blob, offset)
+    
+    data = {}
+    for count, (field_name, ids) in zip(counts, VECTOR_FIELDS):
+        ratings = blob[offset:offset + count]
+        if len(ratings) != count:
+            raise BinaryFormatError("Truncated .M20b file")
+        offset += count
+        data[field_name] = {name: value for name, value in zip(ids, ratings)
+                            if value != ABSENT}
+    
+    if flags & FLAG_CORE_PACKED:
+        try:
+            data.update(zip(CORE_FIELDS, _CORE.unpack_from(blob, offset)))
+        except struct.error as e:
+            raise BinaryFormatError("Truncated .M20b file") from e
+        offset += _CORE.size
+    
+    rest_blob, offset = _read_block(blob, offset)
+    try:
+        rest = canonical.loads(zlib.decompress(rest_blob))
+    except zlib.error as e:
+        raise BinaryFormatError(f"Corrupt .M20b data block: {e}") from e
+    
+    for field_name, leftovers in rest.pop(EXTRA_KEY, {}).items():
+        data.setdefault(field_name, {}).update(leftovers)
+    
+    summary = canonical.loads(summary_json)
+    summary.pop("content_hash", None)  # derived, not a character field
+    data.update(summary)
+    data.update(rest)
+    return data
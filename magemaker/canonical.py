@@ -0,0 +1,53 @@
+"""
+Canonical compact JSON for saved character data
+
+Keys are sorted, there is no whitespace, text is written as UTF-8 rather
+than \\u escapes, and fields still at their default value can be left out
+(from_dict fills them back in). The same data always gives the same bytes,
+so the output is used for content hashes as well as for saving.
+
+orjson is used when it is installed and the stdlib json module otherwise.
+Both produce identical bytes for character data (text, integers, lists
+and dicts), so hashes don't depend on which one is present.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def strip_defaults(data: dict, defaults: dict) -> dict:
+    """Copy of data without the entries equal to their value in defaults."""
+    return {key: value for key, value in data.items()
+            if key not in defaults or defaults[key] != value}
+
+
+def _stdlib_dumps(data) -> bytes:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"),
+                      ensure_ascii=False).encode("utf-8", "surrogatepass")
+
+
+def dumps(data) -> bytes:
+    """Canonical compact JSON bytes for data."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass  # Something orjson is stricter about, e.g. non-text keys
+    return _stdlib_dumps(data)
+
+
+def loads(blob):
+    """Parse JSON from bytes or text."""
+    if orjson is not None:
+        try:
+            return orjson.loads(blob)
+        except orjson.JSONDecodeError:
+            pass  # Let the stdlib decide, and raise its usual error
+    return json.loads(blob)
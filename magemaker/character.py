@@ -2,18 +2,229 @@
 Character model for Mage: The Ascension 20th Anniversary Edition
 """
 
-import json
+import copy
+import hashlib
+import mmap
 import os
+import re
 from datetime import datetime
-from typing import Optional
-from dataclasses import dataclass, field
+from typing import Callable, Optional
+from dataclasses import dataclass, field, fields, asdict, MISSING
+from . import binary, canonical, export, ledger, rules, schema, sidecar
+from .sheet import SectionCache
+from .binary import BINARY_EXTENSION
+from .traits import TRAIT_CATEGORIES
+from .vectors import (
+    AttributeRatings, AbilityRatings, SphereRatings, BackgroundRatings, HealthLevels,
+    Baseline,
+)
+from .fileio import atomic_write
 from .data import (
-    ATTRIBUTES, PRIMARY_ABILITIES, SECONDARY_ABILITIES, SPHERES,
-    BACKGROUNDS, AFFILIATIONS, CREATION_RULES, FREEBIE_COSTS, EXPERIENCE_COSTS
+    ATTRIBUTES, PRIMARY_ABILITIES, SPHERES,
+    AFFILIATIONS, CREATION_RULES
 )
 
 
-@dataclass
+# Markers around the JSON copy of the character at the end of a .M20 file
+DATA_BLOCK_START = b"<!-- CHARACTER_DATA\n"
+DATA_BLOCK_END = b"\nEND_CHARACTER_DATA -->"
+
+# Bytes read from the head of a .M20b file when only the summary is needed
+SUMMARY_PROBE_SIZE = 4096
+
+# One-line summary written just ahead of the data block
+SUMMARY_LINE_START = b"<!-- CHARACTER_SUMMARY "
+SUMMARY_LINE_END = b" -->"
+
+
+@dataclass(frozen=True)
+class CharacterSummary:
+    """Lightweight record of the fields needed for listing and searching."""
+    
+    name: str = "New Character"
+    faction: str = ""
+    group: str = ""
+    concept: str = ""
+    creation_mode: str = "creation"
+    arete: int = 1
+    experience_total: int = 0
+    experience_spent: int = 0
+    modified_date: str = ""
+    content_hash: str = ""
+    
+    @property
+    def experience_available(self) -> int:
+        return self.experience_total - self.experience_spent
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CharacterSummary':
+        """Pick summary fields out of a summary line or full character dict."""
+        return cls(**{key: data[key] for key in SUMMARY_FIELDS if key in data})
+
+
+SUMMARY_FIELDS = tuple(CharacterSummary.__dataclass_fields__)
+
+
+def _attribute_dots(name: str, rating: int) -> tuple:
+    category, tier = TRAIT_CATEGORIES.get(name, (None, None))
+    if tier != "attribute":
+        return None, 0
+    return ("attributes", category), max(0, rating - 1)  # the first dot is free
+
+
+def _ability_dots(name: str, rating: int) -> tuple:
+    category, tier = TRAIT_CATEGORIES.get(name, (None, None))
+    if tier not in ("primary", "secondary"):
+        return None, 0
+    return ("abilities", category), rating
+
+
+def _background_dots(name: str, rating: int) -> tuple:
+    return ("backgrounds",), rating * rules.background_dot_multiplier(name)
+
+
+def _sphere_dots(name: str, rating: int) -> tuple:
+    return ("spheres",), rating
+
+
+@dataclass(frozen=True)
+class TraitHandler:
+    """How one trait type is stored on a Character."""
+    
+    field_name: str
+    keyed: bool = True          # name -> rating dict, else a single int field
+    default: int = 0
+    drop_zero: bool = False     # remove dict entries set to 0 or less
+    cap_field: str = ""         # int field kept at or below the rating
+    # (name, rating) -> (path into the creation totals, dots), if counted
+    creation_dots: Optional[Callable[[str, int], tuple]] = None
+    
+    def get(self, char: 'Character', name: str) -> int:
+        if self.keyed:
+            return getattr(char, self.field_name).get(name, self.default)
+        return getattr(char, self.field_name)
+    
+    def set(self, char: 'Character', name: str, value: int):
+        if not self.keyed:
+            setattr(char, self.field_name, value)
+        elif value > 0 or not self.drop_zero:
+            getattr(char, self.field_name)[name] = value
+        else:
+            getattr(char, self.field_name).pop(name, None)
+        if self.cap_field:
+            setattr(char, self.cap_field, min(getattr(char, self.cap_field), value))
+    
+    def stored_rating(self, value: int) -> int:
+        """The rating a set() of value leaves behind, as counted by a rescan."""
+        return max(0, value) if self.drop_zero else value
+
+
+TRAIT_HANDLERS = {
+    "attribute": TraitHandler("attributes", default=1, creation_dots=_attribute_dots),
+    "ability": TraitHandler("abilities", drop_zero=True, creation_dots=_ability_dots),
+    "sphere": TraitHandler("spheres", creation_dots=_sphere_dots),
+    "background": TraitHandler("backgrounds", drop_zero=True, creation_dots=_background_dots),
+    "arete": TraitHandler("arete", keyed=False),
+    "willpower": TraitHandler("willpower", keyed=False, cap_field="willpower_current"),
+    "quintessence": TraitHandler("quintessence", keyed=False),
+}
+
+
+# ChangeResult.reason values
+REJECT_UNKNOWN_TRAIT = "unknown_trait"
+REJECT_BELOW_MINIMUM = "below_minimum"
+REJECT_INSUFFICIENT_FREEBIES = "insufficient_freebies"
+REJECT_INSUFFICIENT_XP = "insufficient_xp"
+
+
+@dataclass(frozen=True)
+class ChangeResult:
+    """Outcome of Character.apply_change."""
+    
+    trait_type: str
+    trait_name: str
+    old_value: Optional[int]
+    new_value: int
+    applied: bool = True
+    cost: int = 0
+    currency: str = ""          # "freebie", "xp", or "" if the change was free
+    reason: str = ""            # one of the REJECT_* values when not applied
+    message: str = ""
+    minimum: int = 0
+    freebie_points_available: int = 0
+    experience_available: int = 0
+
+
+def _find_trailing_data_block(mm: mmap.mmap) -> Optional[tuple[int, int]]:
+    """Locate the last CHARACTER_DATA block by searching backwards from EOF.
+    Returns (start, end) offsets of the JSON text, or None."""
+    start = mm.rfind(DATA_BLOCK_START)
+    if start < 0:
+        return None
+    end = mm.find(DATA_BLOCK_END, start + len(DATA_BLOCK_START))
+    if end < 0:
+        return None
+    return start, end
+
+
+def _read_trailing_data_block(filepath: str) -> Optional[bytes]:
+    """Read the JSON text of the last CHARACTER_DATA block in a file.
+    Returns None if no complete block was found."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            block = _find_trailing_data_block(mm)
+            if block is None:
+                return None
+            start, end = block
+            return mm[start + len(DATA_BLOCK_START):end]
+
+
+def _read_trailing_summary(filepath: str) -> Optional[dict]:
+    """Read the summary line just ahead of the data block, falling back to
+    the data block itself for files saved before summaries existed."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            block = _find_trailing_data_block(mm)
+            if block is None:
+                return None
+            start, end = block
+            
+            # The summary is the single line directly above the block
+            line_start = mm.rfind(b"\n", 0, max(start - 1, 0)) + 1
+            line = mm[line_start:max(start - 1, line_start)]
+            if line.startswith(SUMMARY_LINE_START) and line.endswith(SUMMARY_LINE_END):
+                try:
+                    return canonical.loads(line[len(SUMMARY_LINE_START):-len(SUMMARY_LINE_END)])
+                except ValueError:
+                    pass
+            
+            try:
+                return canonical.loads(mm[start + len(DATA_BLOCK_START):end])
+            except ValueError:
+                return None
+
+
+# Character fields kept as compact rating vectors, and their types
+VECTOR_FIELDS = {
+    "attributes": AttributeRatings,
+    "abilities": AbilityRatings,
+    "spheres": SphereRatings,
+    "backgrounds": BackgroundRatings,
+    "health_levels": HealthLevels,
+}
+
+# Character fields holding minimum ratings from earlier modes
+BASELINE_FIELDS = ("creation_baselines", "freebie_baselines")
+
+# Field -> the type its value is stored as
+_STORED_AS = dict(VECTOR_FIELDS, **{name: Baseline for name in BASELINE_FIELDS})
+
+
+@dataclass(slots=True)
 class Character:
     """Represents a Mage character."""
     
@@ -30,10 +241,8 @@ class Character:
     nature: str = ""
     demeanor: str = ""
     
-    # Attributes (dict of attribute name -> rating)
-    attributes: dict = field(default_factory=lambda: {
-        attr: 1 for category in ATTRIBUTES.values() for attr in category
-    })
+    # Attributes (attribute name -> rating)
+    attributes: AttributeRatings = field(default_factory=lambda: AttributeRatings.filled(1))
     
     # Priority assignments for creation mode
     attribute_priorities: dict = field(default_factory=lambda: {
@@ -43,18 +252,18 @@ class Character:
         "Talents": None, "Skills": None, "Knowledges": None
     })
     
-    # Abilities (dict of ability name -> rating)
-    abilities: dict = field(default_factory=dict)
+    # Abilities (ability name -> rating)
+    abilities: AbilityRatings = field(default_factory=AbilityRatings)
     
     # Specialties (dict of trait name -> list of specialties)
     specialties: dict = field(default_factory=dict)
     
-    # Spheres (dict of sphere name -> rating)
-    spheres: dict = field(default_factory=lambda: {sphere: 0 for sphere in SPHERES})
+    # Spheres (sphere name -> rating)
+    spheres: SphereRatings = field(default_factory=lambda: SphereRatings.filled(0))
     affinity_sphere: str = ""
     
-    # Backgrounds (dict of background name -> rating)
-    backgrounds: dict = field(default_factory=dict)
+    # Backgrounds (background name -> rating)
+    backgrounds: BackgroundRatings = field(default_factory=BackgroundRatings)
     
     # Core traits
     arete: int = 1
@@ -63,12 +272,8 @@ class Character:
     quintessence: int = 0
     paradox: int = 0
     
-    # Health
-    health_levels: dict = field(default_factory=lambda: {
-        "Bruised": False, "Hurt": False, "Injured": False,
-        "Wounded": False, "Mauled": False, "Crippled": False,
-        "Incapacitated": False
-    })
+    # Health (level name -> marked)
+    health_levels: HealthLevels = field(default_factory=lambda: HealthLevels.filled(False))
     
     # Merits and Flaws (dict of name -> cost/bonus)
     merits: dict = field(default_factory=dict)
@@ -84,8 +289,8 @@ class Character:
     freebie_points_spent: int = 0
     
     # Track baseline values from previous modes (cannot be reduced below these)
-    creation_baselines: dict = field(default_factory=dict)  # trait_name -> value
-    freebie_baselines: dict = field(default_factory=dict)   # trait_name -> value
+    creation_baselines: Baseline = field(default_factory=Baseline)
+    freebie_baselines: Baseline = field(default_factory=Baseline)
     
     # Metadata
     created_date: str = field(default_factory=lambda: datetime.now().isoformat())
@@ -100,10 +305,34 @@ class Character:
     # Avatar description
     avatar_description: str = ""
     
+    # Save tracking (not serialized): content hash and path of the last save
+    _saved_hash: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _saved_path: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Running creation dot totals kept by set_trait (not serialized)
+    _creation_totals: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Rendered Markdown sheet sections (not serialized, shared with snapshots)
+    _sheet_cache: SectionCache = field(default_factory=SectionCache, init=False, repr=False,
+                                       compare=False)
+    
     def __post_init__(self):
-        """Initialize abilities to empty if not set."""
-        if not self.abilities:
-            self.abilities = {}
+        """Store rating and baseline fields passed as plain dicts as vectors."""
+        for name, vector_type in _STORED_AS.items():
+            value = getattr(self, name)
+            if type(value) is not vector_type:
+                setattr(self, name, vector_type(value))
+    
+    def set_ratings(self, name: str, ratings):
+        """Replace a rating or baseline field wholesale, e.g.
+        set_ratings("abilities", {"Awareness": 2}). Plain dicts are stored as
+        the field's vector type and the running creation totals are reset;
+        assigning the field directly does neither."""
+        vector_type = _STORED_AS[name]
+        if type(ratings) is not vector_type:
+            ratings = vector_type(ratings)
+        setattr(self, name, ratings)
+        self._creation_totals = None
     
     @property
     def avatar_rating(self) -> int:
@@ -150,20 +379,22 @@ class Character:
     
     def get_attribute_category(self, attr_name: str) -> Optional[str]:
         """Get the category for an attribute."""
-        for category, attrs in ATTRIBUTES.items():
-            if attr_name in attrs:
-                return category
-        return None
+        category, tier = TRAIT_CATEGORIES.get(attr_name, (None, None))
+        return category if tier == "attribute" else None
     
     def get_ability_category(self, ability_name: str) -> Optional[str]:
         """Get the category for an ability."""
-        for category, abilities in PRIMARY_ABILITIES.items():
-            if ability_name in abilities:
-                return category
-        for category, abilities in SECONDARY_ABILITIES.items():
-            if ability_name in abilities:
-                return category
-        return None
+        category, tier = TRAIT_CATEGORIES.get(ability_name, (None, None))
+        return category if tier in ("primary", "secondary") else None
+    
+    def get_abilities_by_category(self) -> dict:
+        """Group the character's ability names by category, in one pass."""
+        groups = {category: [] for category in PRIMARY_ABILITIES}
+        for ability in self.abilities:
+            category = self.get_ability_category(ability)
+            if category:
+                groups.setdefault(category, []).append(ability)
+        return groups
     
     def get_affinity_sphere_options(self) -> list:
         """Get available affinity sphere options based on group."""
@@ -186,7 +417,8 @@ class Character:
         return group_data.get("forbidden_spheres", [])
     
     def calculate_creation_dots_spent(self) -> dict:
-        """Calculate dots spent in creation mode for each category."""
+        """Calculate dots spent in creation mode for each category.
+        Rescans every trait; get_creation_dots_spent is the cheap version."""
         result = {
             "attributes": {"Physical": 0, "Social": 0, "Mental": 0},
             "abilities": {"Talents": 0, "Skills": 0, "Knowledges": 0},
@@ -201,18 +433,13 @@ class Character:
         
         # Count ability dots
         for ability, rating in self.abilities.items():
-            category = self.get_ability_category(ability)
-            if category:
+            category, tier = TRAIT_CATEGORIES.get(ability, (None, None))
+            if tier in ("primary", "secondary"):
                 result["abilities"][category] += rating
         
         # Count background dots
         for bg, rating in self.backgrounds.items():
-            # Check if double cost
-            double_cost_bgs = [b[0] for b in BACKGROUNDS["double_cost"]]
-            if bg in double_cost_bgs:
-                result["backgrounds"] += rating * 2
-            else:
-                result["backgrounds"] += rating
+            result["backgrounds"] += rating * rules.background_dot_multiplier(bg)
         
         # Count sphere dots
         for sphere, rating in self.spheres.items():
@@ -220,9 +447,30 @@ class Character:
         
         return result
     
+    def get_creation_dots_spent(self) -> dict:
+        """Get dots spent in creation mode from the running totals."""
+        if self._creation_totals is None:
+            self._creation_totals = self.calculate_creation_dots_spent()
+        totals = self._creation_totals
+        return {
+            "attributes": dict(totals["attributes"]),
+            "abilities": dict(totals["abilities"]),
+            "backgrounds": totals["backgrounds"],
+            "spheres": totals["spheres"],
+        }
+    
+    def invalidate_creation_totals(self):
+        """Drop the running totals after editing trait dicts directly."""
+        self._creation_totals = None
+    
+    def verify_creation_totals(self) -> bool:
+        """Check the running totals against a full rescan."""
+        return (self._creation_totals is None or
+                self._creation_totals == self.calculate_creation_dots_spent())
+    
     def get_creation_dots_remaining(self) -> dict:
         """Get remaining dots to spend in creation mode."""
-        spent = self.calculate_creation_dots_spent()
+        spent = self.get_creation_dots_spent()
         rules = CREATION_RULES
         
         # Determine attribute allowances based on priorities
@@ -260,17 +508,116 @@ class Character:
     
     def get_minimum_value(self, trait_type: str, trait_name: str) -> int:
         """Get minimum allowed value for a trait (from previous modes)."""
-        key = f"{trait_type}:{trait_name}"
         # Check freebie baseline first (highest), then creation baseline
-        if key in self.freebie_baselines:
-            return self.freebie_baselines[key]
-        if key in self.creation_baselines:
-            return self.creation_baselines[key]
+        minimum = self.freebie_baselines.get(trait_type, trait_name)
+        if minimum is None:
+            minimum = self.creation_baselines.get(trait_type, trait_name)
+        if minimum is not None:
+            return minimum
         # Default minimums
         if trait_type == "attribute":
             return 1  # All attributes start at 1
         return 0
     
+    def get_trait(self, trait_type: str, trait_name: str) -> Optional[int]:
+        """Get the current rating of a trait, or None for unknown trait types."""
+        handler = TRAIT_HANDLERS.get(trait_type)
+        return handler.get(self, trait_name) if handler else None
+    
+    def set_trait(self, trait_type: str, trait_name: str, new_value: int):
+        """Set a trait rating, keeping the creation dot totals up to date.
+        All trait changes should go through here rather than the dicts.
+        No rules are checked; apply_change is the checked version."""
+        handler = TRAIT_HANDLERS.get(trait_type)
+        if handler is None:
+            raise ValueError(f"Unknown trait type: {trait_type}")
+        
+        old_value = handler.get(self, trait_name)
+        handler.set(self, trait_name, new_value)
+        
+        if self._creation_totals is not None and handler.creation_dots:
+            path, old_dots = handler.creation_dots(trait_name, old_value)
+            if path is not None:
+                _, new_dots = handler.creation_dots(trait_name, handler.stored_rating(new_value))
+                totals = self._creation_totals
+                for key in path[:-1]:
+                    totals = totals[key]
+                totals[path[-1]] += new_dots - old_dots
+    
+    def apply_change(self, trait_type: str, trait_name: str, new_value: int,
+                     override: bool = False) -> ChangeResult:
+        """Change a trait under the rules of the current mode.
+        Checks the minimum from earlier modes, then charges freebie points
+        or XP unless override (Storyteller override) is set. Nothing is
+        changed when the result is not applied."""
+        handler = TRAIT_HANDLERS.get(trait_type)
+        if handler is None:
+            return self._change_result(
+                trait_type, trait_name, None, new_value, applied=False,
+                reason=REJECT_UNKNOWN_TRAIT, message=f"Unknown trait type: {trait_type}")
+        
+        old_value = handler.get(self, trait_name)
+        minimum = self.get_minimum_value(trait_type, trait_name)
+        if new_value < minimum:
+            return self._change_result(
+                trait_type, trait_name, old_value, new_value, applied=False,
+                minimum=minimum, reason=REJECT_BELOW_MINIMUM,
+                message=f"Cannot reduce {trait_name} below {minimum} (set in previous mode).")
+        
+        cost = 0
+        currency = ""
+        if self.creation_mode == "freebie" and not override:
+            cost = self.calculate_freebie_cost(trait_type, trait_name, old_value, new_value)
+            currency = "freebie"
+            if cost > 0 and cost > self.freebie_points_available:
+                return self._change_result(
+                    trait_type, trait_name, old_value, new_value, applied=False,
+                    cost=cost, currency=currency, minimum=minimum,
+                    reason=REJECT_INSUFFICIENT_FREEBIES,
+                    message=f"Need {cost} freebie points, but only "
+                            f"{self.freebie_points_available} available.")
+            self.freebie_points_spent += cost
+        elif self.creation_mode == "xp" and not override:
+            cost = self.calculate_xp_cost(trait_type, trait_name, old_value, new_value)
+            currency = "xp"
+            if cost > 0 and cost > self.experience_available:
+                return self._change_result(
+                    trait_type, trait_name, old_value, new_value, applied=False,
+                    cost=cost, currency=currency, minimum=minimum,
+                    reason=REJECT_INSUFFICIENT_XP,
+                    message=f"Need {cost} XP, but only {self.experience_available} available.")
+            if cost > 0:
+                self.record_experience(ledger.purchase_entry(
+                    trait_type, trait_name, old_value, new_value, cost))
+            self.experience_spent += cost
+        
+        self.set_trait(trait_type, trait_name, new_value)
+        return self._change_result(trait_type, trait_name, old_value, new_value,
+                                   cost=cost, currency=currency if cost else "",
+                                   minimum=minimum)
+    
+    def record_experience(self, entry: dict):
+        """Append an XP ledger entry (see ledger.py).
+        Call before applying the balance change the entry records."""
+        ledger.open_ledger(self.experience_log, self.experience_total, self.experience_spent)
+        ledger.append(self.experience_log, entry)
+    
+    def award_experience(self, amount: int, note: str = ""):
+        """Add XP to the character's total, recording it in the ledger."""
+        self.record_experience(ledger.award_entry(amount, note))
+        self.experience_total += amount
+    
+    def audit_experience(self) -> list[str]:
+        """Check the XP balance against the ledger. Returns any mismatches."""
+        return ledger.audit(self.experience_log, self.experience_total, self.experience_spent)
+    
+    def _change_result(self, trait_type: str, trait_name: str, old_value: Optional[int],
+                       new_value: int, **fields) -> ChangeResult:
+        return ChangeResult(trait_type, trait_name, old_value, new_value,
+                            freebie_points_available=self.freebie_points_available,
+                            experience_available=self.experience_available,
+                            **fields)
+    
     def can_advance_mode(self) -> tuple[bool, list[str]]:
         """Check if character can advance to next mode. Returns (can_advance, warnings)."""
         warnings = []
@@ -314,133 +661,46 @@ class Character:
     def calculate_freebie_cost(self, trait_type: str, trait_name: str, 
                               old_value: int, new_value: int) -> int:
         """Calculate freebie point cost for changing a trait."""
-        if new_value <= old_value:
-            return 0  # No cost for decreases (though they may not be allowed)
-        
-        costs = FREEBIE_COSTS
-        total_cost = 0
-        
-        # Calculate cost for each dot increase
-        for rating in range(old_value, new_value):
-            if trait_type == "attribute":
-                total_cost += costs["attribute"]
-            elif trait_type == "ability":
-                total_cost += costs["ability"]
-            elif trait_type == "background":
-                # Check if double cost
-                double_cost_bgs = [b[0] for b in BACKGROUNDS["double_cost"]]
-                if trait_name in double_cost_bgs:
-                    total_cost += costs["background"] * 2
-                else:
-                    total_cost += costs["background"]
-            elif trait_type == "sphere":
-                total_cost += costs["sphere"]
-            elif trait_type == "arete":
-                total_cost += costs["arete"]
-            elif trait_type == "willpower":
-                total_cost += costs["willpower"]
-            elif trait_type == "quintessence":
-                # Quintessence is 1 point per 4 dots
-                if (rating + 1) % 4 == 0:
-                    total_cost += 1
-        
-        return total_cost
+        return rules.freebie_cost(trait_type, trait_name, old_value, new_value)
     
     def calculate_xp_cost(self, trait_type: str, trait_name: str,
                          old_value: int, new_value: int) -> int:
         """Calculate XP cost for changing a trait."""
-        if new_value <= old_value:
-            return 0  # No cost for decreases (though they may not be allowed)
-        
-        costs = EXPERIENCE_COSTS
-        total_cost = 0
-        
-        # Calculate cost for each dot increase
-        for rating in range(old_value, new_value):
-            if trait_type == "attribute":
-                total_cost += (rating + 1) * costs["attribute"]
-            elif trait_type == "ability":
-                if rating == 0:
-                    total_cost += costs["new_ability"]
-                else:
-                    total_cost += (rating + 1) * costs["ability"]
-            elif trait_type == "sphere":
-                if rating == 0:
-                    total_cost += costs["new_sphere"]
-                elif trait_name == self.affinity_sphere:
-                    total_cost += (rating + 1) * costs["affinity_sphere"]
-                else:
-                    total_cost += (rating + 1) * costs["other_sphere"]
-            elif trait_type == "arete":
-                total_cost += (rating + 1) * costs["arete"]
-            elif trait_type == "background":
-                total_cost += (rating + 1) * costs["background"]
-            elif trait_type == "willpower":
-                total_cost += (rating + 1) * costs["willpower"]
-        
-        return total_cost
+        affinity = trait_type == "sphere" and trait_name == self.affinity_sphere
+        return rules.xp_cost(trait_type, old_value, new_value, affinity)
     
     def snapshot_baseline(self):
         """Snapshot current values as baseline for current mode."""
-        # Snapshot all current trait values
-        baselines = {}
-        
-        # Attributes
-        for attr, value in self.attributes.items():
-            baselines[f"attribute:{attr}"] = value
-        
-        # Abilities
-        for ability, value in self.abilities.items():
-            baselines[f"ability:{ability}"] = value
-        
-        # Backgrounds
-        for bg, value in self.backgrounds.items():
-            baselines[f"background:{bg}"] = value
-        
-        # Spheres
-        for sphere, value in self.spheres.items():
-            baselines[f"sphere:{sphere}"] = value
+        if self.creation_mode == "creation":
+            baselines = Baseline()
+        elif self.creation_mode == "freebie":
+            # Starts out sharing the creation layer; only raised traits copy it
+            baselines = self.creation_baselines.layered()
+        else:
+            return
         
-        # Core traits
-        baselines["arete"] = self.arete
-        baselines["willpower"] = self.willpower
-        baselines["quintessence"] = self.quintessence
+        # Only rated traits; core traits have no minimum from earlier modes
+        for trait_type, handler in TRAIT_HANDLERS.items():
+            if handler.keyed:
+                for name, value in getattr(self, handler.field_name).items():
+                    baselines.set(trait_type, name, value)
         
-        # Store in appropriate baseline dict
         if self.creation_mode == "creation":
-            self.creation_baselines = baselines.copy()
-        elif self.creation_mode == "freebie":
-            self.freebie_baselines = baselines.copy()
+            self.creation_baselines = baselines
+        else:
+            self.freebie_baselines = baselines
     
     def calculate_xp_cost_for_increase(self, trait_type: str, trait_name: str, 
                                        current_rating: int) -> int:
         """Calculate XP cost to increase a trait by 1."""
-        costs = EXPERIENCE_COSTS
-        
-        if trait_type == "attribute":
-            return current_rating * costs["attribute"]
-        elif trait_type == "ability":
-            if current_rating == 0:
-                return costs["new_ability"]
-            return current_rating * costs["ability"]
-        elif trait_type == "sphere":
-            if current_rating == 0:
-                return costs["new_sphere"]
-            if trait_name == self.affinity_sphere:
-                return current_rating * costs["affinity_sphere"]
-            return current_rating * costs["other_sphere"]
-        elif trait_type == "arete":
-            return current_rating * costs["arete"]
-        elif trait_type == "background":
-            return current_rating * costs["background"]
-        elif trait_type == "willpower":
-            return current_rating * costs["willpower"]
-        
-        return 0
+        return self.calculate_xp_cost(trait_type, trait_name, current_rating, current_rating + 1)
     
-    def to_dict(self) -> dict:
-        """Convert character to dictionary for serialization."""
+    def to_dict(self, text_refs: bool = False) -> dict:
+        """Convert character to dictionary for serialization.
+        With text_refs, sidecar text that hasn't been read yet is left as a
+        sidecar.SidecarText instead of being loaded."""
         return {
+            "schema_version": schema.SCHEMA_VERSION,
             "name": self.name,
             "player": self.player,
             "chronicle": self.chronicle,
@@ -450,20 +710,20 @@ class Character:
             "essence": self.essence,
             "nature": self.nature,
             "demeanor": self.demeanor,
-            "attributes": self.attributes,
+            "attributes": dict(self.attributes),
             "attribute_priorities": self.attribute_priorities,
             "ability_priorities": self.ability_priorities,
-            "abilities": self.abilities,
+            "abilities": dict(self.abilities),
             "specialties": self.specialties,
-            "spheres": self.spheres,
+            "spheres": dict(self.spheres),
             "affinity_sphere": self.affinity_sphere,
-            "backgrounds": self.backgrounds,
+            "backgrounds": dict(self.backgrounds),
             "arete": self.arete,
             "willpower": self.willpower,
             "willpower_current": self.willpower_current,
             "quintessence": self.quintessence,
             "paradox": self.paradox,
-            "health_levels": self.health_levels,
+            "health_levels": dict(self.health_levels),
             "merits": self.merits,
             "flaws": self.flaws,
             "experience_total": self.experience_total,
@@ -471,172 +731,236 @@ class Character:
             "experience_log": self.experience_log,
             "creation_mode": self.creation_mode,
             "freebie_points_spent": self.freebie_points_spent,
-            "creation_baselines": self.creation_baselines,
-            "freebie_baselines": self.freebie_baselines,
+            "creation_baselines": self.creation_baselines.to_data(),
+            "freebie_baselines": self.freebie_baselines.to_data(),
             "created_date": self.created_date,
             "modified_date": self.modified_date,
-            "notes": self.notes,
+            "notes": self._text("notes", text_refs),
             "paradigm": self.paradigm,
             "practice": self.practice,
             "instruments": self.instruments,
-            "avatar_description": self.avatar_description
+            "avatar_description": self._text("avatar_description", text_refs)
         }
     
+    def _text(self, name: str, text_refs: bool):
+        return sidecar.raw_text(self, name) if text_refs else getattr(self, name)
+    
+    def snapshot(self) -> 'Character':
+        """Get an independent deep copy, safe to hand to a worker thread."""
+        return copy.deepcopy(self)
+    
+    def __getstate__(self):
+        """State for copy and pickle. Sidecar text not read yet stays unread."""
+        state = {f.name: getattr(self, f.name) for f in fields(self)
+                 if f.name not in sidecar.SIDECAR_FIELDS}
+        for name in sidecar.SIDECAR_FIELDS:
+            state[name] = sidecar.raw_text(self, name)
+        return state
+    
+    def __setstate__(self, state: dict):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Character':
-        """Create character from dictionary."""
-        char = cls()
-        for key, value in data.items():
-            if hasattr(char, key):
-                setattr(char, key, value)
+        """Create character from dictionary.
+        Older saves are migrated first; every field is then checked against
+        schema.CHARACTER_SCHEMA, so bad data raises CharacterSchemaError.
+        Defaults are only built for fields the data doesn't have."""
+        data = schema.migrate(data)
+        char = object.__new__(cls)
+        for name, check, convert, default, default_factory in _FROM_DICT_PLAN:
+            value = data.get(name, MISSING) if check is not None else MISSING
+            if value is not MISSING:
+                value = check(value, name)
+                if convert is not None:
+                    value = convert(value)
+            elif default_factory is not MISSING:
+                value = default_factory()
+            else:
+                value = default
+            object.__setattr__(char, name, value)
         return char
     
-    def save_to_markdown(self, filepath: str):
-        """Save character to markdown file."""
-        self.modified_date = datetime.now().isoformat()
-        
-        md_content = self._generate_markdown()
+    def to_json(self, data: Optional[dict] = None) -> bytes:
+        """Get canonical compact JSON of the character, leaving out fields
+        at their default value. data is a to_dict() result to reuse, or its
+        sidecar.file_form() when saving to a file."""
+        if data is None:
+            data = self.to_dict()
+        return canonical.dumps(canonical.strip_defaults(data, _DEFAULT_DATA))
+    
+    def content_hash(self, data: Optional[dict] = None) -> str:
+        """Get a SHA-256 hash of the character's content.
+        modified_date is left out so saving alone never changes the hash.
+        Long text counts by its hash (see sidecar.file_form), so it is not
+        read just to hash it. data is a to_dict() result to reuse."""
+        if data is None:
+            data = self.to_dict(text_refs=True)
+        content = canonical.strip_defaults(sidecar.file_form(data), _DEFAULT_DATA)
+        del content["modified_date"]
+        return hashlib.sha256(canonical.dumps(content)).hexdigest()
+    
+    @property
+    def is_dirty(self) -> bool:
+        """Check if the character changed since it was last saved or loaded."""
+        return self._saved_hash is None or self._saved_hash != self.content_hash()
+    
+    def mark_saved(self, content_hash: Optional[str], filepath: Optional[str]):
+        """Record the content hash and path of the file now on disk."""
+        self._saved_hash = content_hash
+        self._saved_path = os.path.abspath(filepath) if filepath else None
+    
+    def _is_saved_as(self, content_hash: str, filepath: str) -> bool:
+        """Check if this exact content was already saved to filepath."""
+        return (content_hash == self._saved_hash and
+                os.path.abspath(filepath) == self._saved_path and
+                os.path.exists(filepath))
+    
+    def save(self, filepath: str, durability: Optional[str] = None,
+             force: bool = False) -> bool:
+        """Save in the format matching the file extension (.M20 or .M20b)."""
+        if filepath.endswith(BINARY_EXTENSION):
+            return self.save_to_binary(filepath, durability, force)
+        return self.save_to_markdown(filepath, durability, force)
+    
+    @classmethod
+    def load(cls, filepath: str) -> 'Character':
+        """Load from a file in either format, chosen by extension."""
+        if filepath.endswith(BINARY_EXTENSION):
+            return cls.load_from_binary(filepath)
+        return cls.load_from_markdown(filepath)
+    
+    def save_to_binary(self, filepath: str, durability: Optional[str] = None,
+                       force: bool = False) -> bool:
+        """Save character to the compact binary .M20b format.
+        Same skip-unchanged and durability behaviour as save_to_markdown."""
+        data = self.to_dict(text_refs=True)
+        content_hash = self.content_hash(data)
+        if not force and self._is_saved_as(content_hash, filepath):
+            return False
+        
+        self.modified_date = data["modified_date"] = datetime.now().isoformat()
+        data = sidecar.save_texts(data, sidecar.sidecar_directory(filepath), durability)
+        blob = binary.encode(data, asdict(self.summary(content_hash)))
+        atomic_write(filepath, blob, durability)
+        self.mark_saved(content_hash, filepath)
+        return True
+    
+    @classmethod
+    def load_from_binary(cls, filepath: str) -> 'Character':
+        """Load character from a .M20b file."""
+        with open(filepath, 'rb') as f:
+            return cls._from_saved(binary.decode(f.read()), filepath)
+    
+    @classmethod
+    def _from_saved(cls, data: dict, filepath: str) -> 'Character':
+        """from_dict for data read from filepath, linking its sidecar text."""
+        char = cls.from_dict(data)
+        sidecar.attach(char, data, sidecar.sidecar_directory(filepath))
+        char._mark_loaded(data, filepath)
+        return char
+    
+    def _mark_loaded(self, data: dict, filepath: str):
+        """mark_saved for a character just read from filepath. Files saved
+        before the current schema version (legacy ones have none) get no
+        path recorded, so the next save rewrites them even without changes."""
+        if data.get("schema_version") != schema.SCHEMA_VERSION:
+            filepath = None
+        self.mark_saved(self.content_hash(), filepath)
+    
+    def save_to_markdown(self, filepath: str, durability: Optional[str] = None,
+                         force: bool = False) -> bool:
+        """Save character to markdown file.
+        durability overrides the default fileio durability mode.
+        Returns False without touching the file if nothing changed since
+        the last save to the same path, unless force is set."""
+        data = self.to_dict(text_refs=True)
+        content_hash = self.content_hash(data)
+        if not force and self._is_saved_as(content_hash, filepath):
+            return False
+        
+        self.modified_date = data["modified_date"] = datetime.now().isoformat()
+        data = sidecar.save_texts(data, sidecar.sidecar_directory(filepath), durability)
+        atomic_write(filepath, self.to_markdown(content_hash, data), durability)
+        self.mark_saved(content_hash, filepath)
+        return True
+    
+    def to_markdown(self, content_hash: Optional[str] = None,
+                    data: Optional[dict] = None) -> str:
+        """Get the full .M20 file content: readable sheet, summary line and data block.
+        data is a to_dict() result to reuse, or its sidecar.file_form() when
+        long text is saved separately."""
+        text_refs = data.get(sidecar.REFS_KEY, {}) if data is not None else {}
+        md_content = self._generate_markdown(text_refs)
+        
+        # Summary line for listing without parsing the full data block.
+        # ">" is escaped so names can never close the HTML comment early.
+        summary_json = canonical.dumps(asdict(self.summary(content_hash))).decode("utf-8")
+        summary_json = summary_json.replace(">", "\\u003e")
+        md_content += f"\n\n<!-- CHARACTER_SUMMARY {summary_json} -->"
         
         # Append JSON data as a hidden block
-        json_data = json.dumps(self.to_dict(), indent=2)
-        md_content += f"\n\n<!-- CHARACTER_DATA\n{json_data}\nEND_CHARACTER_DATA -->\n"
-        
-        with open(filepath, 'w') as f:
-            f.write(md_content)
-    
-    def _generate_markdown(self) -> str:
-        """Generate readable markdown representation."""
-        lines = []
-        lines.append(f"# {self.name}")
-        lines.append("")
-        
-        # Identity
-        lines.append("## Identity")
-        lines.append(f"- **Player:** {self.player}")
-        lines.append(f"- **Chronicle:** {self.chronicle}")
-        lines.append(f"- **Concept:** {self.concept}")
-        lines.append(f"- **Faction:** {self.faction}")
-        lines.append(f"- **Group:** {self.group}")
-        lines.append(f"- **Essence:** {self.essence}")
-        lines.append(f"- **Nature:** {self.nature}")
-        lines.append(f"- **Demeanor:** {self.demeanor}")
-        lines.append("")
-        
-        # Attributes
-        lines.append("## Attributes")
-        for category, attrs in ATTRIBUTES.items():
-            lines.append(f"### {category}")
-            for attr in attrs:
-                rating = self.attributes.get(attr, 1)
-                dots = "●" * rating + "○" * (5 - rating)
-                spec = ""
-                specialty_key = f"attribute:{attr}"
-                if specialty_key in self.specialties:
-                    spec = f" ({', '.join(self.specialties[specialty_key])})"
-                lines.append(f"- **{attr}:** {dots}{spec}")
-            lines.append("")
-        
-        # Abilities
-        lines.append("## Abilities")
-        for category in ["Talents", "Skills", "Knowledges"]:
-            lines.append(f"### {category}")
-            abilities_in_cat = [a for a in self.abilities.keys() 
-                              if self.get_ability_category(a) == category]
-            for ability in sorted(abilities_in_cat):
-                rating = self.abilities[ability]
-                if rating > 0:
-                    dots = "●" * rating + "○" * (5 - rating)
-                    spec = ""
-                    if ability in self.specialties:
-                        spec = f" ({', '.join(self.specialties[ability])})"
-                    lines.append(f"- **{ability}:** {dots}{spec}")
-            lines.append("")
-        
-        # Spheres
-        lines.append("## Spheres")
-        lines.append(f"**Affinity Sphere:** {self.affinity_sphere}")
-        lines.append("")
-        for sphere in SPHERES:
-            rating = self.spheres.get(sphere, 0)
-            if rating > 0:
-                dots = "●" * rating + "○" * (5 - rating)
-                affinity = " (Affinity)" if sphere == self.affinity_sphere else ""
-                lines.append(f"- **{sphere}:** {dots}{affinity}")
-        lines.append("")
-        
-        # Backgrounds
-        lines.append("## Backgrounds")
-        for bg, rating in sorted(self.backgrounds.items()):
-            if rating > 0:
-                dots = "●" * rating + "○" * (5 - rating)
-                lines.append(f"- **{bg}:** {dots}")
-        lines.append("")
-        
-        # Core Traits
-        lines.append("## Core Traits")
-        arete_dots = "●" * self.arete + "○" * (10 - self.arete)
-        lines.append(f"- **Arete:** {arete_dots}")
-        will_dots = "●" * self.willpower + "○" * (10 - self.willpower)
-        lines.append(f"- **Willpower:** {will_dots} (Current: {self.willpower_current})")
-        lines.append(f"- **Quintessence:** {self.quintessence}")
-        lines.append(f"- **Paradox:** {self.paradox}")
-        lines.append("")
-        
-        # Merits and Flaws
-        if self.merits or self.flaws:
-            lines.append("## Merits and Flaws")
-            if self.merits:
-                lines.append("### Merits")
-                for merit, cost in sorted(self.merits.items()):
-                    lines.append(f"- {merit} ({cost} pts)")
-            if self.flaws:
-                lines.append("### Flaws")
-                for flaw, bonus in sorted(self.flaws.items()):
-                    lines.append(f"- {flaw} ({bonus} pts)")
-            lines.append("")
-        
-        # Focus
-        lines.append("## Focus")
-        lines.append(f"- **Paradigm:** {self.paradigm}")
-        lines.append(f"- **Practice:** {self.practice}")
-        lines.append(f"- **Instruments:** {', '.join(self.instruments) if self.instruments else 'None'}")
-        lines.append("")
-        
-        # Avatar
-        if self.avatar_description:
-            lines.append("## Avatar")
-            lines.append(self.avatar_description)
-            lines.append("")
-        
-        # Experience
-        lines.append("## Experience")
-        lines.append(f"- **Total:** {self.experience_total}")
-        lines.append(f"- **Spent:** {self.experience_spent}")
-        lines.append(f"- **Available:** {self.experience_available}")
-        lines.append("")
-        
-        # Notes
-        if self.notes:
-            lines.append("## Notes")
-            lines.append(self.notes)
-            lines.append("")
-        
-        return "\n".join(lines)
+        json_data = self.to_json(data).decode("utf-8")
+        md_content += f"\n<!-- CHARACTER_DATA\n{json_data}\nEND_CHARACTER_DATA -->\n"
+        return md_content
+    
+    def summary(self, content_hash: Optional[str] = None) -> CharacterSummary:
+        """Get the listing summary for this character."""
+        fields = {key: getattr(self, key) for key in SUMMARY_FIELDS if key != "content_hash"}
+        fields["content_hash"] = content_hash or self.content_hash()
+        return CharacterSummary(**fields)
+    
+    @classmethod
+    def load_summary(cls, filepath: str) -> CharacterSummary:
+        """Load only the listing summary of a character file.
+        Avoids building a full Character whenever the file has a data block."""
+        if filepath.endswith(BINARY_EXTENSION):
+            with open(filepath, 'rb') as f:
+                # The summary block sits right after the fixed-size header
+                head = f.read(SUMMARY_PROBE_SIZE)
+                try:
+                    return CharacterSummary.from_dict(binary.decode_summary(head))
+                except binary.BinaryFormatError:
+                    f.seek(0)
+                    return CharacterSummary.from_dict(binary.decode_summary(f.read()))
+        
+        data = _read_trailing_summary(filepath)
+        if isinstance(data, dict):
+            return CharacterSummary.from_dict(data)
+        return cls.load_from_markdown(filepath).summary()
+    
+    def _generate_markdown(self, text_refs: Optional[dict] = None) -> str:
+        """Generate readable markdown representation.
+        Fields in text_refs (name -> hash) link to their sidecar instead.
+        Only sections whose fields changed since the last call are rebuilt."""
+        return self._sheet_cache.render(self, text_refs or {})
     
     @classmethod
     def load_from_markdown(cls, filepath: str) -> 'Character':
         """Load character from markdown file."""
+        # Fast path: the data block is always appended last by save_to_markdown
+        json_bytes = _read_trailing_data_block(filepath)
+        if json_bytes is not None:
+            try:
+                data = canonical.loads(json_bytes)
+                char = cls.from_dict(data)
+            except ValueError:
+                pass  # Damaged tail, fall back to scanning the whole file
+            else:
+                sidecar.attach(char, data, sidecar.sidecar_directory(filepath))
+                char._mark_loaded(data, filepath)
+                return char
+        
         with open(filepath, 'r') as f:
             content = f.read()
         
         # Extract JSON data from hidden block
-        import re
         match = re.search(r'<!-- CHARACTER_DATA\n(.*?)\nEND_CHARACTER_DATA -->', 
                          content, re.DOTALL)
         
         if match:
-            json_data = json.loads(match.group(1))
-            return cls.from_dict(json_data)
+            return cls._from_saved(canonical.loads(match.group(1)), filepath)
         
         # Fallback: create new character with just the name from title
         char = cls()
@@ -645,157 +969,41 @@ class Character:
             char.name = title_match.group(1)
         return char
     
-    def export_to_text(self, filepath: str):
+    def markdown_sections(self):
+        """Yield the sections of the readable sheet, as in a .M20 file."""
+        return self._sheet_cache.sections(self, {})
+    
+    def export(self, filepath: str, format_name: Optional[str] = None,
+               durability: Optional[str] = None):
+        """Export the character sheet in one of export.FORMATS
+        (text, markdown, html, json), by default the one matching the
+        file extension."""
+        export.export(self, filepath, format_name, durability)
+    
+    def export_to_text(self, filepath: str, durability: Optional[str] = None):
         """Export character to plain text file."""
-        lines = []
-        lines.append("=" * 60)
-        lines.append(f"  {self.name.upper()}")
-        lines.append("  Mage: The Ascension 20th Anniversary Edition")
-        lines.append("=" * 60)
-        lines.append("")
-        
-        # Identity
-        lines.append("-" * 30 + " IDENTITY " + "-" * 30)
-        lines.append(f"Player: {self.player:<30} Chronicle: {self.chronicle}")
-        lines.append(f"Concept: {self.concept:<28} Essence: {self.essence}")
-        lines.append(f"Faction: {self.faction:<28} Group: {self.group}")
-        lines.append(f"Nature: {self.nature:<29} Demeanor: {self.demeanor}")
-        lines.append("")
-        
-        # Attributes
-        lines.append("-" * 28 + " ATTRIBUTES " + "-" * 28)
-        
-        # Format attributes in columns
-        phys = ATTRIBUTES["Physical"]
-        soc = ATTRIBUTES["Social"]
-        ment = ATTRIBUTES["Mental"]
-        
-        lines.append(f"{'PHYSICAL':<22} {'SOCIAL':<22} {'MENTAL':<22}")
-        for i in range(3):
-            p_attr = phys[i]
-            s_attr = soc[i]
-            m_attr = ment[i]
-            p_dots = "●" * self.attributes.get(p_attr, 1) + "○" * (5 - self.attributes.get(p_attr, 1))
-            s_dots = "●" * self.attributes.get(s_attr, 1) + "○" * (5 - self.attributes.get(s_attr, 1))
-            m_dots = "●" * self.attributes.get(m_attr, 1) + "○" * (5 - self.attributes.get(m_attr, 1))
-            
-            # Add specialties if present
-            p_spec = ""
-            s_spec = ""
-            m_spec = ""
-            if f"attribute:{p_attr}" in self.specialties:
-                p_spec = f" ({', '.join(self.specialties[f'attribute:{p_attr}'])})"
-            if f"attribute:{s_attr}" in self.specialties:
-                s_spec = f" ({', '.join(self.specialties[f'attribute:{s_attr}'])})"
-            if f"attribute:{m_attr}" in self.specialties:
-                m_spec = f" ({', '.join(self.specialties[f'attribute:{m_attr}'])})"
-            
-            lines.append(f"{p_attr:<12} {p_dots}{p_spec}  {s_attr:<12} {s_dots}{s_spec}  {m_attr:<12} {m_dots}{m_spec}")
-        lines.append("")
-        
-        # Abilities
-        lines.append("-" * 28 + " ABILITIES " + "-" * 29)
-        lines.append(f"{'TALENTS':<22} {'SKILLS':<22} {'KNOWLEDGES':<22}")
-        
-        talents = [a for a in self.abilities if self.get_ability_category(a) == "Talents"]
-        skills = [a for a in self.abilities if self.get_ability_category(a) == "Skills"]
-        knowledges = [a for a in self.abilities if self.get_ability_category(a) == "Knowledges"]
-        
-        max_len = max(len(talents), len(skills), len(knowledges), 1)
-        for i in range(max_len):
-            t = talents[i] if i < len(talents) else ""
-            s = skills[i] if i < len(skills) else ""
-            k = knowledges[i] if i < len(knowledges) else ""
-            
-            t_dots = "●" * self.abilities.get(t, 0) + "○" * (5 - self.abilities.get(t, 0)) if t else "     "
-            s_dots = "●" * self.abilities.get(s, 0) + "○" * (5 - self.abilities.get(s, 0)) if s else "     "
-            k_dots = "●" * self.abilities.get(k, 0) + "○" * (5 - self.abilities.get(k, 0)) if k else "     "
-            
-            lines.append(f"{t:<12} {t_dots}  {s:<12} {s_dots}  {k:<12} {k_dots}")
-        lines.append("")
-        
-        # Spheres
-        lines.append("-" * 29 + " SPHERES " + "-" * 30)
-        lines.append(f"Affinity: {self.affinity_sphere}")
-        sphere_strs = []
-        for sphere in SPHERES:
-            rating = self.spheres.get(sphere, 0)
-            dots = "●" * rating + "○" * (5 - rating)
-            sphere_strs.append(f"{sphere:<15} {dots}")
-        
-        # Print in 3 columns
-        for i in range(0, len(sphere_strs), 3):
-            row = sphere_strs[i:i+3]
-            lines.append("  ".join(row))
-        lines.append("")
-        
-        # Backgrounds
-        lines.append("-" * 27 + " BACKGROUNDS " + "-" * 28)
-        bg_strs = []
-        for bg, rating in sorted(self.backgrounds.items()):
-            if rating > 0:
-                dots = "●" * rating + "○" * (5 - rating)
-                bg_strs.append(f"{bg:<15} {dots}")
-        
-        for i in range(0, len(bg_strs), 3):
-            row = bg_strs[i:i+3]
-            lines.append("  ".join(row))
-        lines.append("")
-        
-        # Core Traits
-        lines.append("-" * 27 + " CORE TRAITS " + "-" * 28)
-        arete_dots = "●" * self.arete + "○" * (10 - self.arete)
-        will_dots = "●" * self.willpower + "○" * (10 - self.willpower)
-        lines.append(f"Arete:       {arete_dots}")
-        lines.append(f"Willpower:   {will_dots}  (Current: {self.willpower_current})")
-        lines.append(f"Quintessence: {self.quintessence:<5} Paradox: {self.paradox}")
-        lines.append("")
-        
-        # Health
-        lines.append("-" * 30 + " HEALTH " + "-" * 30)
-        health_labels = ["Bruised -0", "Hurt -1", "Injured -1", "Wounded -2", 
-                        "Mauled -2", "Crippled -5", "Incapacitated"]
-        for label in health_labels:
-            key = label.split()[0]
-            marked = "[X]" if self.health_levels.get(key, False) else "[ ]"
-            lines.append(f"  {marked} {label}")
-        lines.append("")
-        
-        # Merits and Flaws
-        if self.merits or self.flaws:
-            lines.append("-" * 26 + " MERITS & FLAWS " + "-" * 26)
-            if self.merits:
-                lines.append("MERITS:")
-                for merit, cost in sorted(self.merits.items()):
-                    lines.append(f"  {merit} ({cost} pts)")
-            if self.flaws:
-                lines.append("FLAWS:")
-                for flaw, bonus in sorted(self.flaws.items()):
-                    lines.append(f"  {flaw} ({bonus} pts)")
-            lines.append("")
-        
-        # Focus
-        lines.append("-" * 30 + " FOCUS " + "-" * 31)
-        lines.append(f"Paradigm:    {self.paradigm}")
-        lines.append(f"Practice:    {self.practice}")
-        lines.append(f"Instruments: {', '.join(self.instruments) if self.instruments else 'None'}")
-        lines.append("")
-        
-        # Experience
-        lines.append("-" * 28 + " EXPERIENCE " + "-" * 28)
-        lines.append(f"Total: {self.experience_total}  Spent: {self.experience_spent}  Available: {self.experience_available}")
-        lines.append("")
-        
-        # Notes
-        if self.notes:
-            lines.append("-" * 30 + " NOTES " + "-" * 31)
-            lines.append(self.notes)
-            lines.append("")
-        
-        lines.append("=" * 68)
-        lines.append(f"Created: {self.created_date}  Modified: {self.modified_date}")
-        lines.append("=" * 68)
-        
-        with open(filepath, 'w') as f:
-            f.write("\n".join(lines))
+        export.export(self, filepath, "text", durability)
+
+
+sidecar.install(Character)
+
+
+def _build_from_dict_plan() -> tuple:
+    """(field, checker, converter, default, default_factory) for every
+    Character field, in declaration order. Unsaved fields get no checker;
+    the baseline checkers already return Baselines."""
+    converters = VECTOR_FIELDS
+    return tuple(
+        (f.name, schema.CHARACTER_SCHEMA[f.name] if f.init else None,
+         converters.get(f.name), f.default, f.default_factory)
+        for f in fields(Character)
+    )
+
+
+_FROM_DICT_PLAN = _build_from_dict_plan()
+
 
+# to_dict() values of a new character, left out of canonical JSON. Changing
+# a default needs a schema migration that writes the old one back in.
+_DEFAULT_DATA = {key: value for key, value in Character().to_dict().items()
+                 if key not in ("schema_version", "created_date", "modified_date")}
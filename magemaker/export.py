@@ -0,0 +1,510 @@
+"""
+Character sheet export in several formats
+
+Plain text and HTML are templates: tuples of the nodes below, rendered
+against sheet_context(). A template is compiled into a chain of closures
+the first time it is used and cached, so bulk exports only pay for
+building each character's context and writing the lines. Markdown reuses
+the section-cached .M20 sheet (sheet.py); JSON is the character data.
+
+All formats stream to a file handle. Adding a format means writing a
+template (or a write function) and registering it in FORMATS.
+"""
+
+import html
+import json
+import string
+from collections import ChainMap
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+from .data import ATTRIBUTES, PRIMARY_ABILITIES, SPHERES
+from .fileio import atomic_open
+from .sheet import dot_string
+
+
+HEALTH_LABELS = ("Bruised -0", "Hurt -1", "Injured -1", "Wounded -2",
+                 "Mauled -2", "Crippled -5", "Incapacitated")
+
+
+# Template nodes
+
+@dataclass(frozen=True)
+class Text:
+    """A literal line."""
+    text: str
+
+
+@dataclass(frozen=True)
+class Line:
+    """A line formatted with str.format_map against the context."""
+    fmt: str
+
+
+@dataclass(frozen=True)
+class Each:
+    """Render body once per item of context[key], with the item as name.
+    key may be a dotted path into the context, e.g. "group.abilities"."""
+    key: str
+    name: str
+    body: tuple
+
+
+@dataclass(frozen=True)
+class If:
+    """Render body only if context[key] is truthy."""
+    key: str
+    body: tuple
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Format each item of context[key] with cell, columns cells per line."""
+    key: str
+    columns: int
+    separator: str
+    cell: str
+
+
+def _lookup(context, key: str):
+    value = context
+    for part in key.split("."):
+        value = value[part]
+    return value
+
+
+def _check_format(fmt: str) -> str:
+    """Parse fmt once so a broken template fails when compiled, not mid-export."""
+    list(string.Formatter().parse(fmt))
+    return fmt
+
+
+def _compile_node(node) -> Callable:
+    """Node -> function(context) yielding lines."""
+    if isinstance(node, Text):
+        lines = (node.text,)
+        return lambda context: lines
+    
+    if isinstance(node, Line):
+        format_line = _check_format(node.fmt).format_map
+        return lambda context: (format_line(context),)
+    
+    if isinstance(node, Each):
+        body = _compile_body(node.body)
+        key, name = node.key, node.name
+        
+        def render_each(context):
+            for item in _lookup(context, key):
+                scope = ChainMap({name: item}, context)
+                for render in body:
+                    yield from render(scope)
+        return render_each
+    
+    if isinstance(node, If):
+        body = _compile_body(node.body)
+        key = node.key
+        
+        def render_if(context):
+            if _lookup(context, key):
+                for render in body:
+                    yield from render(context)
+        return render_if
+    
+    if isinstance(node, Grid):
+        format_cell = _check_format(node.cell).format_map
+        key, columns, separator = node.key, node.columns, node.separator
+        
+        def render_grid(context):
+            cells = [format_cell(item) for item in _lookup(context, key)]
+            for i in range(0, len(cells), columns):
+                yield separator.join(cells[i:i + columns])
+        return render_grid
+    
+    raise TypeError(f"Unknown template node: {node!r}")
+
+
+def _compile_body(nodes: tuple) -> tuple:
+    return tuple(_compile_node(node) for node in nodes)
+
+
+@lru_cache(maxsize=None)
+def compile_template(template: tuple) -> Callable:
+    """Compile a template into function(context) yielding its lines.
+    Cached, so each template is compiled once per process."""
+    body = _compile_body(template)
+    
+    def render(context):
+        for part in body:
+            yield from part(context)
+    return render
+
+
+# Context shared by the templates
+
+def _cell(name: str, rating: int, spec: str = "") -> dict:
+    return {"name": name, "rating": rating, "dots": dot_string(rating), "spec": spec}
+
+
+_BLANK_CELL = {"name": "", "rating": 0, "dots": " " * 5, "spec": ""}
+
+
+def _specialty(specialties: dict, key: str) -> str:
+    if key in specialties:
+        return f" ({', '.join(specialties[key])})"
+    return ""
+
+
+def sheet_context(char) -> dict:
+    """Everything the sheet templates show, computed once per character."""
+    attribute_groups = [
+        {"category": category,
+         "attributes": [_cell(attr, char.attributes.get(attr, 1),
+                              _specialty(char.specialties, f"attribute:{attr}"))
+                        for attr in attrs]}
+        for category, attrs in ATTRIBUTES.items()
+    ]
+    
+    abilities_by_category = char.get_abilities_by_category()
+    ability_columns = [[_cell(ability, char.abilities.get(ability, 0),
+                              _specialty(char.specialties, ability))
+                        for ability in abilities_by_category[category]]
+                       for category in PRIMARY_ABILITIES]
+    
+    spheres = [dict(_cell(sphere, char.spheres.get(sphere, 0)),
+                    affinity=" (Affinity)" if sphere == char.affinity_sphere else "")
+               for sphere in SPHERES]
+    backgrounds = [_cell(bg, rating) for bg, rating in sorted(char.backgrounds.items())
+                   if rating > 0]
+    
+    health = []
+    for label in HEALTH_LABELS:
+        marked = bool(char.health_levels.get(label.split()[0], False))
+        health.append({"label": label, "marked": marked,
+                       "box": "[X]" if marked else "[ ]"})
+    
+    merits = [{"name": name, "points": cost} for name, cost in sorted(char.merits.items())]
+    flaws = [{"name": name, "points": bonus} for name, bonus in sorted(char.flaws.items())]
+    
+    return {
+        "name": char.name,
+        "name_upper": char.name.upper(),
+        "player": char.player,
+        "chronicle": char.chronicle,
+        "concept": char.concept,
+        "essence": char.essence,
+        "faction": char.faction,
+        "group": char.group,
+        "nature": char.nature,
+        "demeanor": char.demeanor,
+        "attribute_groups": attribute_groups,
+        # Physical, Social and Mental side by side
+        "attribute_rows": [dict(zip("psm", cells)) for cells in
+                           zip(*(group["attributes"] for group in attribute_groups))],
+        "ability_groups": [
+            {"category": category,
+             "abilities": sorted((cell for cell in column if cell["rating"] > 0),
+                                 key=lambda cell: cell["name"])}
+            for category, column in zip(PRIMARY_ABILITIES, ability_columns)
+        ],
+        # Talents, Skills and Knowledges side by side, padded with blanks
+        "ability_rows": [
+            dict(zip("tsk", (column[i] if i < len(column) else _BLANK_CELL
+                             for column in ability_columns)))
+            for i in range(max(1, *(len(column) for column in ability_columns)))
+        ],
+        "affinity_sphere": char.affinity_sphere,
+        "spheres": spheres,
+        "rated_spheres": [cell for cell in spheres if cell["rating"] > 0],
+        "backgrounds": backgrounds,
+        "arete": char.arete,
+        "arete_dots": dot_string(char.arete, 10),
+        "willpower": char.willpower,
+        "willpower_dots": dot_string(char.willpower, 10),
+        "willpower_current": char.willpower_current,
+        "quintessence": char.quintessence,
+        "paradox": char.paradox,
+        "health": health,
+        "merits": merits,
+        "flaws": flaws,
+        "merits_or_flaws": bool(merits or flaws),
+        "paradigm": char.paradigm,
+        "practice": char.practice,
+        "instruments": ", ".join(char.instruments) if char.instruments else "None",
+        "avatar_description": char.avatar_description,
+        "experience_total": char.experience_total,
+        "experience_spent": char.experience_spent,
+        "experience_available": char.experience_available,
+        "notes": char.notes,
+        "created_date": char.created_date,
+        "modified_date": char.modified_date,
+    }
+
+
+def _escape_all(value, escape: Callable):
+    """Copy of a context with every string passed through escape."""
+    if isinstance(value, str):
+        return escape(value)
+    if isinstance(value, dict):
+        return {key: _escape_all(item, escape) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_escape_all(item, escape) for item in value]
+    return value
+
+
+# Templates
+
+def _rule(title: str, left: int, right: int) -> Text:
+    return Text("-" * left + f" {title} " + "-" * right)
+
+
+TEXT_TEMPLATE = (
+    Text("=" * 60),
+    Line("  {name_upper}"),
+    Text("  Mage: The Ascension 20th Anniversary Edition"),
+    Text("=" * 60),
+    Text(""),
+    _rule("IDENTITY", 30, 30),
+    Line("Player: {player:<30} Chronicle: {chronicle}"),
+    Line("Concept: {concept:<28} Essence: {essence}"),
+    Line("Faction: {faction:<28} Group: {group}"),
+    Line("Nature: {nature:<29} Demeanor: {demeanor}"),
+    Text(""),
+    _rule("ATTRIBUTES", 28, 28),
+    Text(f"{'PHYSICAL':<22} {'SOCIAL':<22} {'MENTAL':<22}"),
+    Each("attribute_rows", "row", (
+        Line("{row[p][name]:<12} {row[p][dots]}{row[p][spec]}  "
+             "{row[s][name]:<12} {row[s][dots]}{row[s][spec]}  "
+             "{row[m][name]:<12} {row[m][dots]}{row[m][spec]}"),
+    )),
+    Text(""),
+    _rule("ABILITIES", 28, 29),
+    Text(f"{'TALENTS':<22} {'SKILLS':<22} {'KNOWLEDGES':<22}"),
+    Each("ability_rows", "row", (
+        Line("{row[t][name]:<12} {row[t][dots]}  {row[s][name]:<12} {row[s][dots]}  "
+             "{row[k][name]:<12} {row[k][dots]}"),
+    )),
+    Text(""),
+    _rule("SPHERES", 29, 30),
+    Line("Affinity: {affinity_sphere}"),
+    Grid("spheres", 3, "  ", "{name:<15} {dots}"),
+    Text(""),
+    _rule("BACKGROUNDS", 27, 28),
+    Grid("backgrounds", 3, "  ", "{name:<15} {dots}"),
+    Text(""),
+    _rule("CORE TRAITS", 27, 28),
+    Line("Arete:       {arete_dots}"),
+    Line("Willpower:   {willpower_dots}  (Current: {willpower_current})"),
+    Line("Quintessence: {quintessence:<5} Paradox: {paradox}"),
+    Text(""),
+    _rule("HEALTH", 30, 30),
+    Each("health", "level", (Line("  {level[box]} {level[label]}"),)),
+    Text(""),
+    If("merits_or_flaws", (
+        _rule("MERITS & FLAWS", 26, 26),
+        If("merits", (
+            Text("MERITS:"),
+            Each("merits", "merit", (Line("  {merit[name]} ({merit[points]} pts)"),)),
+        )),
+        If("flaws", (
+            Text("FLAWS:"),
+            Each("flaws", "flaw", (Line("  {flaw[name]} ({flaw[points]} pts)"),)),
+        )),
+        Text(""),
+    )),
+    _rule("FOCUS", 30, 31),
+    Line("Paradigm:    {paradigm}"),
+    Line("Practice:    {practice}"),
+    Line("Instruments: {instruments}"),
+    Text(""),
+    _rule("EXPERIENCE", 28, 28),
+    Line("Total: {experience_total}  Spent: {experience_spent}  "
+         "Available: {experience_available}"),
+    Text(""),
+    If("notes", (
+        _rule("NOTES", 30, 31),
+        Line("{notes}"),
+        Text(""),
+    )),
+    Text("=" * 68),
+    Line("Created: {created_date}  Modified: {modified_date}"),
+    Text("=" * 68),
+)
+
+
+def _html_list(key: str, name: str, item: str) -> tuple:
+    return (Text("<ul>"), Each(key, name, (Line(f"<li>{item}</li>"),)), Text("</ul>"))
+
+
+def _html_text(key: str, heading: str) -> If:
+    return If(key, (Line(f'<section><h2>{heading}</h2><div class="text">{{{key}}}</div></section>'),))
+
+
+HTML_TEMPLATE = (
+    Text("<!DOCTYPE html>"),
+    Text('<html lang="en">'),
+    Text("<head>"),
+    Text('<meta charset="utf-8">'),
+    Line("<title>{name}</title>"),
+    Text("<style>body{font-family:sans-serif;max-width:50em;margin:auto}"
+         ".dots{font-family:monospace}.text{white-space:pre-wrap}</style>"),
+    Text("</head>"),
+    Text("<body>"),
+    Line("<h1>{name}</h1>"),
+    Text("<p>Mage: The Ascension 20th Anniversary Edition</p>"),
+    Text("<section><h2>Identity</h2><dl>"),
+    Line("<dt>Player</dt><dd>{player}</dd><dt>Chronicle</dt><dd>{chronicle}</dd>"),
+    Line("<dt>Concept</dt><dd>{concept}</dd><dt>Essence</dt><dd>{essence}</dd>"),
+    Line("<dt>Faction</dt><dd>{faction}</dd><dt>Group</dt><dd>{group}</dd>"),
+    Line("<dt>Nature</dt><dd>{nature}</dd><dt>Demeanor</dt><dd>{demeanor}</dd>"),
+    Text("</dl></section>"),
+    Text("<section><h2>Attributes</h2>"),
+    Each("attribute_groups", "group", (
+        Line("<h3>{group[category]}</h3>"),
+        *_html_list("group.attributes", "cell",
+                    '{cell[name]} <span class="dots">{cell[dots]}</span>{cell[spec]}'),
+    )),
+    Text("</section>"),
+    Text("<section><h2>Abilities</h2>"),
+    Each("ability_groups", "group", (
+        Line("<h3>{group[category]}</h3>"),
+        *_html_list("group.abilities", "cell",
+                    '{cell[name]} <span class="dots">{cell[dots]}</span>{cell[spec]}'),
+    )),
+    Text("</section>"),
+    Text("<section><h2>Spheres</h2>"),
+    Line("<p>Affinity Sphere: {affinity_sphere}</p>"),
+    *_html_list("rated_spheres", "cell",
+                '{cell[name]} <span class="dots">{cell[dots]}</span>{cell[affinity]}'),
+    Text("</section>"),
+    Text("<section><h2>Backgrounds</h2>"),
+    *_html_list("backgrounds", "cell", '{cell[name]} <span class="dots">{cell[dots]}</span>'),
+    Text("</section>"),
+    Text("<section><h2>Core Traits</h2><dl>"),
+    Line('<dt>Arete</dt><dd class="dots">{arete_dots}</dd>'),
+    Line('<dt>Willpower</dt><dd><span class="dots">{willpower_dots}</span> '
+         '(Current: {willpower_current})</dd>'),
+    Line("<dt>Quintessence</dt><dd>{quintessence}</dd><dt>Paradox</dt><dd>{paradox}</dd>"),
+    Text("</dl></section>"),
+    Text("<section><h2>Health</h2>"),
+    *_html_list("health", "level", '<span class="dots">{level[box]}</span> {level[label]}'),
+    Text("</section>"),
+    If("merits_or_flaws", (
+        Text("<section><h2>Merits and Flaws</h2>"),
+        If("merits", (
+            Text("<h3>Merits</h3>"),
+            *_html_list("merits", "merit", "{merit[name]} ({merit[points]} pts)"),
+        )),
+        If("flaws", (
+            Text("<h3>Flaws</h3>"),
+            *_html_list("flaws", "flaw", "{flaw[name]} ({flaw[points]} pts)"),
+        )),
+        Text("</section>"),
+    )),
+    Text("<section><h2>Focus</h2><dl>"),
+    Line("<dt>Paradigm</dt><dd>{paradigm}</dd><dt>Practice</dt><dd>{practice}</dd>"),
+    Line("<dt>Instruments</dt><dd>{instruments}</dd>"),
+    Text("</dl></section>"),
+    _html_text("avatar_description", "Avatar"),
+    Text("<section><h2>Experience</h2><dl>"),
+    Line("<dt>Total</dt><dd>{experience_total}</dd><dt>Spent</dt><dd>{experience_spent}</dd>"
+         "<dt>Available</dt><dd>{experience_available}</dd>"),
+    Text("</dl></section>"),
+    _html_text("notes", "Notes"),
+    Line("<footer>Created: {created_date} &middot; Modified: {modified_date}</footer>"),
+    Text("</body>"),
+    Text("</html>"),
+    Text(""),
+)
+
+
+# Formats
+
+def _write_lines(out, lines):
+    """Write lines to out separated by newlines, one line at a time."""
+    first = True
+    for line in lines:
+        if not first:
+            out.write("\n")
+        out.write(line)
+        first = False
+
+
+@dataclass(frozen=True)
+class TemplateFormat:
+    """Format rendered from a template over sheet_context()."""
+    
+    name: str
+    extension: str
+    template: tuple
+    escape: Optional[Callable] = None
+    
+    def write(self, char, out):
+        context = sheet_context(char)
+        if self.escape is not None:
+            context = _escape_all(context, self.escape)
+        _write_lines(out, compile_template(self.template)(context))
+
+
+@dataclass(frozen=True)
+class MarkdownFormat:
+    """The readable half of a .M20 file, from the character's section cache."""
+    
+    name: str = "markdown"
+    extension: str = ".md"
+    
+    def write(self, char, out):
+        _write_lines(out, char.markdown_sections())
+
+
+@dataclass(frozen=True)
+class JsonFormat:
+    """The full character data as indented JSON."""
+    
+    name: str = "json"
+    extension: str = ".json"
+    
+    def write(self, char, out):
+        json.dump(char.to_dict(), out, indent=2, ensure_ascii=False)
+        out.write("\n")
+
+
+FORMATS = {
+    export_format.name: export_format for export_format in (
+        TemplateFormat("text", ".txt", TEXT_TEMPLATE),
+        MarkdownFormat(),
+        TemplateFormat("html", ".html", HTML_TEMPLATE, escape=html.escape),
+        JsonFormat(),
+    )
+}
+
+DEFAULT_FORMAT = "text"
+
+
+def format_for_path(filepath: str) -> str:
+    """Name of the format matching filepath's extension, or DEFAULT_FORMAT."""
+    lowered = filepath.lower()
+    for export_format in FORMATS.values():
+        if lowered.endswith(export_format.extension):
+            return export_format.name
+    if lowered.endswith(".htm"):
+        return "html"
+    return DEFAULT_FORMAT
+
+
+def write(char, out, format_name: str = DEFAULT_FORMAT):
+    """Render char in the named format to an open text file handle."""
+    export_format = FORMATS.get(format_name)
+    if export_format is None:
+        raise ValueError(f"Unknown export format: {format_name}")
+    export_format.write(char, out)
+
+
+def export(char, filepath: str, format_name: Optional[str] = None,
+           durability: Optional[str] = None):
+    """Export char to filepath, streamed through an atomic temp file.
+    The format defaults to the one matching the file extension."""
+    format_name = format_name or format_for_path(filepath)
+    if format_name not in FORMATS:
+        raise ValueError(f"Unknown export format: {format_name}")
+    with atomic_open(filepath, "w", durability) as out:
+        write(char, out, format_name)
@@ -0,0 +1,160 @@
+"""
+Crash-safe file writing for character saves and exports
+"""
+
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+
+# Durability settings for atomic_write
+DURABILITY_NONE = "none"        # atomic rename only, leave flushing to the OS
+DURABILITY_FSYNC = "fsync"      # fsync file and directory on every write
+DURABILITY_BATCHED = "batched"  # fsync pending writes together on a timer
+DURABILITY_MODES = (DURABILITY_NONE, DURABILITY_FSYNC, DURABILITY_BATCHED)
+
+DEFAULT_BATCH_INTERVAL = 2.0  # seconds
+
+
+class FsyncBatcher:
+    """Collects written paths and fsyncs them together after a delay."""
+    
+    def __init__(self, interval: float = DEFAULT_BATCH_INTERVAL):
+        self.interval = interval
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._timer = None
+    
+    def add(self, filepath: str):
+        """Queue a file (and its directory) for the next batched fsync."""
+        with self._lock:
+            self._pending.add(filepath)
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self):
+        """Fsync everything queued so far."""
+        with self._lock:
+            pending = self._pending
+            self._pending = set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        
+        directories = set()
+        for filepath in pending:
+            directories.add(os.path.dirname(filepath))
+            try:
+                fd = os.open(filepath, os.O_RDONLY)
+            except OSError:
+                continue  # Replaced or deleted since; nothing left to flush
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        
+        for directory in directories:
+            _fsync_directory(directory)
+
+
+_durability = DURABILITY_BATCHED
+_batcher = FsyncBatcher()
+
+
+def set_durability(mode: str, batch_interval: Optional[float] = None):
+    """Set the default durability used by atomic_write."""
+    global _durability
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode: {mode}")
+    _durability = mode
+    if batch_interval is not None:
+        _batcher.interval = batch_interval
+
+
+def get_durability() -> str:
+    return _durability
+
+
+def flush_pending():
+    """Fsync any writes still waiting on the batch timer."""
+    _batcher.flush()
+
+
+def _fsync_directory(directory: str):
+    """Make a rename inside directory durable (no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _default_file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once at import; os.umask cannot be queried safely from worker threads
+NEW_FILE_MODE = _default_file_mode()
+
+
+@contextmanager
+def atomic_open(filepath: str, mode: str = "w", durability: Optional[str] = None):
+    """Open a temp file to write filepath through, for streaming output.
+    On a clean exit it replaces filepath the same way atomic_write does;
+    if the block raises, filepath is left untouched. mode is "w" (UTF-8
+    text) or "wb"."""
+    durability = durability or _durability
+    filepath = os.path.abspath(filepath)
+    directory = os.path.dirname(filepath)
+    
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+    try:
+        encoding = "utf-8" if "b" not in mode else None
+        with os.fdopen(fd, mode, encoding=encoding, newline="" if encoding else None) as f:
+            yield f
+            f.flush()
+            if durability == DURABILITY_FSYNC:
+                os.fsync(f.fileno())
+        
+        # Keep the permissions of the file being replaced
+        try:
+            file_mode = stat.S_IMODE(os.stat(filepath).st_mode)
+        except FileNotFoundError:
+            file_mode = NEW_FILE_MODE
+        os.chmod(tmp_path, file_mode)
+        
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    if durability == DURABILITY_FSYNC:
+        _fsync_directory(directory)
+    elif durability == DURABILITY_BATCHED:
+        _batcher.add(filepath)
+
+
+def atomic_write(filepath: str, content, durability: Optional[str] = None):
+    """Write content to filepath via a temp file and os.replace.
+    Readers see either the old file or the complete new one, never a
+    truncated mix. content may be str (written as UTF-8) or bytes."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    with atomic_open(filepath, "wb", durability) as f:
+        f.write(content)
@@ -6,11 +6,17 @@ Main application window with three-panel layout
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, Gio, GLib, Pango
+from gi.repository import Gtk, Adw, Gio, GLib, GObject, Pango
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from .character import Character
+from .character import (
+    Character, REJECT_BELOW_MINIMUM, REJECT_INSUFFICIENT_FREEBIES, REJECT_INSUFFICIENT_XP
+)
+from .store import open_store
+from .history import UndoHistory
+from . import fileio, sidecar
 from .data import (
     ATTRIBUTES, PRIMARY_ABILITIES, SECONDARY_ABILITIES, SPHERES,
     BACKGROUNDS, AFFILIATIONS, ESSENCES, ARCHETYPES, MERITS, FLAWS,
@@ -747,6 +753,7 @@ class CharacterEditor(Gtk.Box):
             self.character.demeanor = widget.get_active_text() or ""
         
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_faction_changed(self, widget):
         if self._updating or not self.character:
@@ -765,6 +772,7 @@ class CharacterEditor(Gtk.Box):
         
         self.character.group = ""
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_group_changed(self, widget):
         if self._updating or not self.character:
@@ -775,6 +783,7 @@ class CharacterEditor(Gtk.Box):
         # Update affinity sphere options
         self._update_affinity_options()
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _update_affinity_options(self):
         if not self.character:
@@ -810,6 +819,7 @@ class CharacterEditor(Gtk.Box):
         self.character.attribute_priorities[category] = priority
         self._update_attr_priority_options()
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_ability_priority_changed(self, widget, category):
         if self._updating or not self.character:
@@ -820,6 +830,7 @@ class CharacterEditor(Gtk.Box):
         self.character.ability_priorities[category] = priority
         self._update_ability_priority_options()
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _update_attr_priority_options(self):
         """Update attribute priority combos to hide already-selected priorities."""
@@ -901,124 +912,71 @@ class CharacterEditor(Gtk.Box):
         
         self._updating = False
     
-    def _change_trait(self, trait_type: str, trait_name: str, new_value: int, 
-                     current_value: int = None) -> bool:
-        """Handle trait changes with cost calculation and restrictions.
+    # Dialog headings for rejected trait changes
+    REJECTION_HEADINGS = {
+        REJECT_BELOW_MINIMUM: "Cannot Reduce Trait",
+        REJECT_INSUFFICIENT_FREEBIES: "Insufficient Freebie Points",
+        REJECT_INSUFFICIENT_XP: "Insufficient Experience Points",
+    }
+    
+    def _change_trait(self, trait_type: str, trait_name: str, new_value: int) -> bool:
+        """Apply a trait change through Character.apply_change.
         Returns True if change was successful, False if blocked."""
         if self._updating or not self.character:
             return False
         
-        char = self.character
-        
-        # Get current value if not provided
-        if current_value is None:
-            if trait_type == "attribute":
-                current_value = char.attributes.get(trait_name, 1)
-            elif trait_type == "ability":
-                current_value = char.abilities.get(trait_name, 0)
-            elif trait_type == "sphere":
-                current_value = char.spheres.get(trait_name, 0)
-            elif trait_type == "background":
-                current_value = char.backgrounds.get(trait_name, 0)
-            elif trait_type == "arete":
-                current_value = char.arete
-            elif trait_type == "willpower":
-                current_value = char.willpower
-            elif trait_type == "quintessence":
-                current_value = char.quintessence
-            else:
-                return False
+        result = self.app.history.apply_change(
+            self.character, trait_type, trait_name, new_value,
+            override=self.app.tracker.storyteller_override)
         
-        # Check minimum value (cannot go below baseline from previous modes)
-        min_value = char.get_minimum_value(trait_type, trait_name)
-        if new_value < min_value:
-            # Revert to minimum
-            widget = self.trait_widgets.get(f"{trait_type}_{trait_name}")
-            if widget:
-                self._updating = True
-                widget.set_value(min_value)
-                self._updating = False
+        if not result.applied:
+            heading = self.REJECTION_HEADINGS.get(result.reason)
+            if heading is None:
+                return False
+            
+            # Revert the widget: to the minimum, or to the unpaid-for value
+            revert_to = result.minimum if result.reason == REJECT_BELOW_MINIMUM else result.old_value
+            self.show_trait(trait_type, trait_name, revert_to)
             
             dialog = Adw.MessageDialog(
                 transient_for=self.app.win,
-                heading="Cannot Reduce Trait",
-                body=f"Cannot reduce {trait_name} below {min_value} (set in previous mode)."
+                heading=heading,
+                body=result.message
             )
             dialog.add_response("ok", "OK")
             dialog.present()
             return False
         
-        # Handle costs based on mode
-        if char.creation_mode == "freebie" and not self.app.tracker.storyteller_override:
-            # Calculate freebie cost
-            cost = char.calculate_freebie_cost(trait_type, trait_name, current_value, new_value)
-            if cost > 0:
-                if cost > char.freebie_points_available:
-                    dialog = Adw.MessageDialog(
-                        transient_for=self.app.win,
-                        heading="Insufficient Freebie Points",
-                        body=f"Need {cost} freebie points, but only {char.freebie_points_available} available."
-                    )
-                    dialog.add_response("ok", "OK")
-                    dialog.present()
-                    # Revert
-                    widget = self.trait_widgets.get(f"{trait_type}_{trait_name}")
-                    if widget:
-                        self._updating = True
-                        widget.set_value(current_value)
-                        self._updating = False
-                    return False
-                
-                char.freebie_points_spent += cost
-        
-        elif char.creation_mode == "xp" and not self.app.tracker.storyteller_override:
-            # Calculate XP cost
-            cost = char.calculate_xp_cost(trait_type, trait_name, current_value, new_value)
-            if cost > 0:
-                if cost > char.experience_available:
-                    dialog = Adw.MessageDialog(
-                        transient_for=self.app.win,
-                        heading="Insufficient Experience Points",
-                        body=f"Need {cost} XP, but only {char.experience_available} available."
-                    )
-                    dialog.add_response("ok", "OK")
-                    dialog.present()
-                    # Revert
-                    widget = self.trait_widgets.get(f"{trait_type}_{trait_name}")
-                    if widget:
-                        self._updating = True
-                        widget.set_value(current_value)
-                        self._updating = False
-                    return False
-                
-                char.experience_spent += cost
-        
-        # Apply the change
-        if trait_type == "attribute":
-            char.attributes[trait_name] = new_value
-        elif trait_type == "ability":
-            if new_value > 0:
-                char.abilities[trait_name] = new_value
-            elif trait_name in char.abilities:
-                del char.abilities[trait_name]
-        elif trait_type == "sphere":
-            char.spheres[trait_name] = new_value
-        elif trait_type == "background":
-            if new_value > 0:
-                char.backgrounds[trait_name] = new_value
-            elif trait_name in char.backgrounds:
-                del char.backgrounds[trait_name]
-        elif trait_type == "arete":
-            char.arete = new_value
-        elif trait_type == "willpower":
-            char.willpower = new_value
-            char.willpower_current = min(char.willpower_current, new_value)
-        elif trait_type == "quintessence":
-            char.quintessence = new_value
-        
         self.app.update_tracker()
+        self.app.character_changed()
         return True
     
+    # trait_widgets key prefix for each keyed trait type
+    WIDGET_PREFIXES = {
+        "attribute": "attr_",
+        "ability": "ability_",
+        "sphere": "sphere_",
+        "background": "bg_",
+    }
+    
+    def _get_trait_widget(self, trait_type: str, trait_name: str):
+        prefix = self.WIDGET_PREFIXES.get(trait_type)
+        if prefix:
+            return self.trait_widgets.get(prefix + trait_name)
+        return {
+            "arete": self.arete_dots,
+            "willpower": self.willpower_dots,
+            "quintessence": self.quintessence_spin,
+        }.get(trait_type)
+    
+    def show_trait(self, trait_type: str, trait_name: str, value: int):
+        """Display a trait value without treating it as an edit."""
+        widget = self._get_trait_widget(trait_type, trait_name)
+        if widget:
+            self._updating = True
+            widget.set_value(value)
+            self._updating = False
+    
     def _on_attribute_changed(self, name, value):
         self._change_trait("attribute", name, value)
     
@@ -1035,6 +993,7 @@ class CharacterEditor(Gtk.Box):
                 self.character.specialties[f"attribute:{name}"] = specialties
             elif f"attribute:{name}" in self.character.specialties:
                 del self.character.specialties[f"attribute:{name}"]
+            self.app.character_changed()
     
     def _on_ability_specialty_changed(self, name):
         """Handle ability specialty text changes."""
@@ -1048,6 +1007,7 @@ class CharacterEditor(Gtk.Box):
                 self.character.specialties[name] = specialties
             elif name in self.character.specialties:
                 del self.character.specialties[name]
+            self.app.character_changed()
     
     def _on_ability_changed(self, name, value):
         self._change_trait("ability", name, value)
@@ -1086,13 +1046,16 @@ class CharacterEditor(Gtk.Box):
                 if sphere != new_affinity:
                     current = self.character.spheres.get(sphere, 0)
                     if current > new_affinity_rating:
-                        self.character.spheres[sphere] = new_affinity_rating
+                        self.character.set_trait("sphere", sphere, new_affinity_rating)
                         sphere_widget = self.trait_widgets.get(f"sphere_{sphere}")
                         if sphere_widget:
                             sphere_widget.set_value(new_affinity_rating)
             self._updating = False
         
+        # Redoing an undone sphere change could go past the new affinity cap
+        self.app.history.clear_redo()
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_background_changed(self, name, value):
         self._change_trait("background", name, value)
@@ -1112,6 +1075,7 @@ class CharacterEditor(Gtk.Box):
             return
         self.character.paradox = int(widget.get_value())
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_merit_toggled(self, widget, name, cost):
         if self._updating or not self.character:
@@ -1121,6 +1085,7 @@ class CharacterEditor(Gtk.Box):
         elif name in self.character.merits:
             del self.character.merits[name]
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_flaw_toggled(self, widget, name, bonus):
         if self._updating or not self.character:
@@ -1130,6 +1095,7 @@ class CharacterEditor(Gtk.Box):
         elif name in self.character.flaws:
             del self.character.flaws[name]
         self.app.update_tracker()
+        self.app.character_changed()
     
     def _on_focus_changed(self, widget, field):
         if self._updating or not self.character:
@@ -1142,18 +1108,22 @@ class CharacterEditor(Gtk.Box):
         elif field == "instruments":
             text = widget.get_text()
             self.character.instruments = [i.strip() for i in text.split(",") if i.strip()]
+        
+        self.app.character_changed()
     
     def _on_avatar_changed(self, buffer):
         if self._updating or not self.character:
             return
         start, end = buffer.get_bounds()
         self.character.avatar_description = buffer.get_text(start, end, False)
+        self.app.character_changed()
     
     def _on_notes_changed(self, buffer):
         if self._updating or not self.character:
             return
         start, end = buffer.get_bounds()
         self.character.notes = buffer.get_text(start, end, False)
+        self.app.character_changed()
     
     def load_character(self, character: Character):
         """Load a character into the editor."""
@@ -1369,6 +1339,10 @@ class ProgressTracker(Gtk.Box):
         # Snapshot baseline before advancing
         char.snapshot_baseline()
         
+        # Earlier changes were paid for under the old mode's rules
+        self.app.history.clear()
+        self.app.update_history_actions()
+        
         if char.creation_mode == "creation":
             char.creation_mode = "freebie"
             self.mode_button.set_label("Advance to XP Mode")
@@ -1378,6 +1352,7 @@ class ProgressTracker(Gtk.Box):
             self.mode_button.set_sensitive(False)
         
         self.update()
+        self.app.character_changed()
     
     def _on_add_xp(self, button):
         if not self.app.current_character:
@@ -1385,9 +1360,10 @@ class ProgressTracker(Gtk.Box):
         
         amount = int(self.xp_entry.get_value())
         if amount > 0:
-            self.app.current_character.experience_total += amount
+            self.app.current_character.award_experience(amount)
             self.xp_entry.set_value(0)
             self.update()
+            self.app.character_changed()
     
     def _on_override_toggled(self, switch, state):
         self.storyteller_override = state
@@ -1653,12 +1629,48 @@ class ProgressTracker(Gtk.Box):
             self.progress_box.append(label)
 
 
+class CharacterItem(GObject.Object):
+    """List model item for a saved character."""
+    
+    __gtype_name__ = "MageMakerCharacterItem"
+    
+    key = GObject.Property(type=str, default="")
+    name = GObject.Property(type=str, default="")
+    faction = GObject.Property(type=str, default="")
+    group = GObject.Property(type=str, default="")
+    subtitle = GObject.Property(type=str, default="")
+    modified = GObject.Property(type=float, default=0.0)
+    
+    def update(self, entry: dict):
+        """Copy fields from a character store entry."""
+        self.key = entry["key"]
+        self.name = entry.get("name") or ""
+        self.faction = entry.get("faction") or ""
+        self.group = entry.get("group") or ""
+        self.subtitle = self.group or self.faction
+        self.modified = entry.get("modified", 0.0)
+
+
 class CharacterList(Gtk.Box):
     """Left sidebar showing saved characters."""
     
+    # Seconds between store scans when no file monitor is available
+    POLL_INTERVAL = 5
+    
+    # Quiet period before single-entry updates are written to the store's
+    # index, so a burst of saves or file events costs one write
+    INDEX_SAVE_DELAY_MS = 2000
+    
+    SORT_KEYS = ["Name", "Faction", "Modified"]
+    
     def __init__(self, app):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=8)
         self.app = app
+        self.items = {}  # store key -> CharacterItem
+        self.sort_key = "Name"
+        self.monitor = None
+        self._poll_source = None
+        self._index_save_source = None
         self.set_margin_start(12)
         self.set_margin_end(12)
         self.set_margin_top(12)
@@ -1674,17 +1686,39 @@ class CharacterList(Gtk.Box):
         new_btn.connect("clicked", self._on_new_character)
         self.append(new_btn)
         
+        # Sort selection
+        sort_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        sort_label = Gtk.Label(label="Sort by:")
+        self.sort_dropdown = Gtk.DropDown.new_from_strings(self.SORT_KEYS)
+        self.sort_dropdown.set_hexpand(True)
+        self.sort_dropdown.connect("notify::selected", self._on_sort_changed)
+        sort_box.append(sort_label)
+        sort_box.append(self.sort_dropdown)
+        self.append(sort_box)
+        
         self.append(Gtk.Separator())
         
-        # Character list
+        # Character list: only rows scrolled into view get widgets
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_vexpand(True)
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         
-        self.listbox = Gtk.ListBox()
-        self.listbox.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self.listbox.connect("row-selected", self._on_character_selected)
-        scrolled.set_child(self.listbox)
+        self.store = Gio.ListStore(item_type=CharacterItem)
+        self.sorter = Gtk.CustomSorter.new(self._compare_items, None)
+        sort_model = Gtk.SortListModel(model=self.store, sorter=self.sorter)
+        
+        self.selection = Gtk.SingleSelection(model=sort_model)
+        self.selection.set_autoselect(False)
+        self.selection.set_can_unselect(True)
+        self.selection.connect("notify::selected-item", self._on_character_selected)
+        
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_item_setup)
+        factory.connect("bind", self._on_item_bind)
+        factory.connect("unbind", self._on_item_unbind)
+        
+        self.listview = Gtk.ListView(model=self.selection, factory=factory)
+        scrolled.set_child(self.listview)
         
         self.append(scrolled)
         
@@ -1696,51 +1730,240 @@ class CharacterList(Gtk.Box):
     def _on_new_character(self, button):
         self.app.new_character()
     
-    def _on_character_selected(self, listbox, row):
-        if row is None:
+    def clear_selection(self):
+        """Deselect the current item so it can be picked again."""
+        self.selection.unselect_all()
+    
+    def _on_character_selected(self, selection, pspec):
+        item = selection.get_selected_item()
+        if item is None or item.key == self.app.current_key:
             return
         
-        filepath = row.filepath
-        self.app.load_character(filepath)
+        self.app.load_character(item.key)
+    
+    def _on_item_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        box.set_margin_start(4)
+        box.set_margin_end(4)
+        box.set_margin_top(4)
+        box.set_margin_bottom(4)
+        
+        name_label = Gtk.Label()
+        name_label.set_xalign(0)
+        name_label.set_hexpand(True)
+        box.append(name_label)
+        
+        subtitle_label = Gtk.Label()
+        subtitle_label.set_xalign(0)
+        subtitle_label.add_css_class("dim-label")
+        box.append(subtitle_label)
+        
+        list_item.set_child(box)
+    
+    def _on_item_bind(self, factory, list_item):
+        item = list_item.get_item()
+        box = list_item.get_child()
+        name_label = box.get_first_child()
+        subtitle_label = name_label.get_next_sibling()
+        
+        # Bindings follow later updates to the item without rebuilding the row
+        flags = GObject.BindingFlags.SYNC_CREATE
+        list_item.bindings = [
+            item.bind_property("name", name_label, "label", flags),
+            item.bind_property("subtitle", subtitle_label, "label", flags),
+        ]
+    
+    def _on_item_unbind(self, factory, list_item):
+        for binding in getattr(list_item, "bindings", []):
+            binding.unbind()
+        list_item.bindings = []
+    
+    def _on_sort_changed(self, dropdown, pspec):
+        self.sort_key = self.SORT_KEYS[dropdown.get_selected()]
+        self.sorter.changed(Gtk.SorterChange.DIFFERENT)
+    
+    def _sort_values(self, item) -> tuple:
+        """What the selected sort key orders item by, then its store key."""
+        if self.sort_key == "Faction":
+            values = (item.faction.casefold(), item.group.casefold(), item.name.casefold())
+        elif self.sort_key == "Modified":
+            # Most recently modified first
+            values = (-item.modified,)
+        else:
+            values = (item.name.casefold(),)
+        return values + (os.path.basename(item.key),)
+    
+    def _compare_items(self, item1, item2, user_data):
+        """Order items by the selected sort key, then by store key."""
+        key1 = self._sort_values(item1)
+        key2 = self._sort_values(item2)
+        return (key1 > key2) - (key1 < key2)
     
     def refresh_list(self):
-        """Refresh the character list from the save directory."""
-        # Clear existing
-        while child := self.listbox.get_first_child():
-            self.listbox.remove(child)
-        
-        save_dir = self.app.save_directory
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
+        """Refresh the character list from the character store."""
+        self.items.clear()
+        for entry in self.app.store.refresh():
+            item = CharacterItem()
+            item.update(entry)
+            self.items[entry["key"]] = item
+        
+        # Replace the whole model in a single items-changed emission
+        self.store.splice(0, self.store.get_n_items(), list(self.items.values()))
+        
+        self._start_watching()
+    
+    def _set_item(self, entry: dict):
+        """Insert an item for an index entry, or update it in place."""
+        item = self.items.get(entry["key"])
+        if item is None:
+            item = CharacterItem()
+            item.update(entry)
+            self.items[entry["key"]] = item
+            self.store.append(item)
+            return
+        
+        old_sort_values = self._sort_values(item)
+        item.update(entry)  # Row labels follow through their bindings
+        if self._sort_values(item) != old_sort_values:
+            # Re-sort without touching row widgets
+            self.sorter.changed(Gtk.SorterChange.DIFFERENT)
+    
+    def _remove_item(self, key: str):
+        item = self.items.pop(key, None)
+        if item is None:
+            return
+        found, position = self.store.find(item)
+        if found:
+            self.store.remove(position)
+    
+    def update_entry(self, key: str):
+        """Insert, update or remove the item for a single stored character."""
+        entry = self.app.store.get_entry(key)
+        if entry is None:
+            self._remove_item(key)
+        else:
+            self._set_item(entry)
+        self._schedule_index_save()
+    
+    def _schedule_index_save(self):
+        if self._index_save_source is None:
+            self._index_save_source = GLib.timeout_add(self.INDEX_SAVE_DELAY_MS,
+                                                       self._on_index_save)
+    
+    def _on_index_save(self):
+        self._index_save_source = None
+        # Written on the I/O worker, off the main thread
+        self.app.executor.submit(self.app.store.flush)
+        return GLib.SOURCE_REMOVE
+    
+    def _start_watching(self):
+        """Watch a file store's directory, falling back to polling."""
+        if self.monitor is not None or self._poll_source is not None:
             return
         
-        for filename in sorted(os.listdir(save_dir)):
-            if filename.endswith(".M20"):
-                filepath = os.path.join(save_dir, filename)
-                
-                # Try to get character name
-                try:
-                    char = Character.load_from_markdown(filepath)
-                    name = char.name
-                except:
-                    name = filename[:-4]  # Remove .M20 extension
-                
-                row = Gtk.ListBoxRow()
-                row.filepath = filepath
-                
-                box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
-                box.set_margin_start(4)
-                box.set_margin_end(4)
-                box.set_margin_top(4)
-                box.set_margin_bottom(4)
-                
-                label = Gtk.Label(label=name)
-                label.set_xalign(0)
-                label.set_hexpand(True)
-                box.append(label)
-                
-                row.set_child(box)
-                self.listbox.append(row)
+        if self.app.store.directory is not None:
+            directory = Gio.File.new_for_path(self.app.store.directory)
+            try:
+                self.monitor = directory.monitor_directory(
+                    Gio.FileMonitorFlags.WATCH_MOVES, None)
+                self.monitor.connect("changed", self._on_directory_changed)
+                return
+            except GLib.Error:
+                self.monitor = None
+        
+        self._poll_source = GLib.timeout_add_seconds(self.POLL_INTERVAL, self._on_poll)
+    
+    def _on_directory_changed(self, monitor, file, other_file, event_type):
+        events = Gio.FileMonitorEvent
+        if event_type in (events.CHANGES_DONE_HINT, events.CREATED,
+                          events.DELETED, events.MOVED_IN, events.MOVED_OUT):
+            self.update_entry(file.get_path())
+        elif event_type == events.RENAMED:
+            self.update_entry(file.get_path())
+            if other_file is not None:
+                self.update_entry(other_file.get_path())
+    
+    def _on_poll(self):
+        updated, removed = self.app.store.poll()
+        for entry in updated:
+            self._set_item(entry)
+        for key in removed:
+            self._remove_item(key)
+        return GLib.SOURCE_CONTINUE
+
+
+class AutosaveService:
+    """Coalesces bursts of edits into a single background save.
+    Saves run once edits pause for delay_ms (or after max_delay_ms of
+    continuous editing), with at most one autosave in flight."""
+    
+    DEFAULT_DELAY_MS = 2000
+    DEFAULT_MAX_DELAY_MS = 15000
+    
+    def __init__(self, app, delay_ms: int = DEFAULT_DELAY_MS,
+                 max_delay_ms: int = DEFAULT_MAX_DELAY_MS):
+        self.app = app
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self._timeout_id = None
+        self._first_change = None  # monotonic ms of the oldest unsaved edit
+        self._in_flight = False
+        self._pending = False
+    
+    @property
+    def enabled(self) -> bool:
+        return self.delay_ms > 0
+    
+    def notify_changed(self):
+        """Record a model change and (re)start the quiet-period timer."""
+        if not self.enabled or not self.app.current_key:
+            return
+        
+        now = GLib.get_monotonic_time() // 1000
+        if self._first_change is None:
+            self._first_change = now
+        
+        # Never postpone past max_delay_ms from the first unsaved edit
+        delay = min(self.delay_ms, max(0, self._first_change + self.max_delay_ms - now))
+        
+        self.cancel()
+        self._timeout_id = GLib.timeout_add(delay, self._on_quiet)
+    
+    def cancel(self):
+        """Drop the pending timer without saving."""
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+    
+    def flush(self):
+        """Queue any pending autosave immediately (e.g. on close or switch)."""
+        if self._timeout_id is None and not self._pending:
+            return
+        self.cancel()
+        self._pending = False
+        self._save()
+    
+    def _on_quiet(self):
+        self._timeout_id = None
+        if self._in_flight:
+            # Coalesce with the write already running
+            self._pending = True
+        else:
+            self._save()
+        return GLib.SOURCE_REMOVE
+    
+    def _save(self):
+        self._first_change = None
+        if not self.app.current_key:
+            return
+        self._in_flight = True
+        self.app.save_current(quiet=True, on_finished=self._on_finished)
+    
+    def _on_finished(self):
+        self._in_flight = False
+        if self._pending:
+            self._pending = False
+            self._save()
 
 
 class MageMakerApp(Adw.Application):
@@ -1751,20 +1974,46 @@ class MageMakerApp(Adw.Application):
                         flags=Gio.ApplicationFlags.FLAGS_NONE)
         
         self.current_character = None
-        self.current_filepath = None
+        self.current_key = None
         
         # Save directory - relative to current working directory
         cwd = os.getcwd()
         self.save_directory = os.path.join(cwd, "characters")
-        os.makedirs(self.save_directory, exist_ok=True)
+        
+        # Durability of saves: none, fsync (per save) or batched (default)
+        durability = os.environ.get("MAGEMAKER_DURABILITY")
+        if durability in fileio.DURABILITY_MODES:
+            fileio.set_durability(durability)
+        
+        # Storage backend: .M20 files (default) or a SQLite database
+        self.store = open_store(self.save_directory,
+                                os.environ.get("MAGEMAKER_STORE"),
+                                mirror=os.environ.get("MAGEMAKER_MARKDOWN_MIRROR") == "1")
+        
+        # Disk I/O runs on a single worker so saves land in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="magemaker-io")
+        self._busy_count = 0
+        
+        # Autosave quiet period in milliseconds (0 disables autosave)
+        try:
+            autosave_delay = int(os.environ.get("MAGEMAKER_AUTOSAVE_DELAY",
+                                                AutosaveService.DEFAULT_DELAY_MS))
+        except ValueError:
+            autosave_delay = AutosaveService.DEFAULT_DELAY_MS
+        self.autosave = AutosaveService(self, autosave_delay)
+        
+        # Undo/redo of trait changes for the current character
+        self.history = UndoHistory()
         
         self.connect("activate", self.on_activate)
+        self.connect("shutdown", self._on_shutdown)
     
     def on_activate(self, app):
         # Create main window
         self.win = Adw.ApplicationWindow(application=app)
         self.win.set_title("MageMaker - Mage: The Ascension 20th Anniversary Edition")
         self.win.set_default_size(1400, 900)
+        self.win.connect("close-request", self._on_close_request)
         
         # Apply CSS
         self._apply_css()
@@ -1780,11 +2029,34 @@ class MageMakerApp(Adw.Application):
         save_btn.connect("clicked", self._on_save)
         header.pack_start(save_btn)
         
+        # Undo/redo buttons and shortcuts
+        self.undo_action = Gio.SimpleAction.new("undo", None)
+        self.undo_action.connect("activate", self._on_undo)
+        self.add_action(self.undo_action)
+        self.set_accels_for_action("app.undo", ["<Control>z"])
+        
+        self.redo_action = Gio.SimpleAction.new("redo", None)
+        self.redo_action.connect("activate", self._on_redo)
+        self.add_action(self.redo_action)
+        self.set_accels_for_action("app.redo", ["<Control><Shift>z", "<Control>y"])
+        
+        undo_btn = Gtk.Button(icon_name="edit-undo-symbolic", action_name="app.undo")
+        undo_btn.set_tooltip_text("Undo")
+        header.pack_start(undo_btn)
+        redo_btn = Gtk.Button(icon_name="edit-redo-symbolic", action_name="app.redo")
+        redo_btn.set_tooltip_text("Redo")
+        header.pack_start(redo_btn)
+        
         # Export button
-        export_btn = Gtk.Button(label="Export TXT")
+        export_btn = Gtk.Button(label="Export")
+        export_btn.set_tooltip_text("Export as text, Markdown, HTML or JSON, by file extension")
         export_btn.connect("clicked", self._on_export)
         header.pack_end(export_btn)
         
+        # Busy indicator for background saves and loads
+        self.spinner = Gtk.Spinner()
+        header.pack_end(self.spinner)
+        
         main_box.append(header)
         
         # Three-panel layout
@@ -1826,7 +2098,9 @@ class MageMakerApp(Adw.Application):
         
         main_box.append(paned_outer)
         
-        self.win.set_content(main_box)
+        self.toast_overlay = Adw.ToastOverlay()
+        self.toast_overlay.set_child(main_box)
+        self.win.set_content(self.toast_overlay)
         
         # Refresh character list
         self.char_list.refresh_list()
@@ -1883,74 +2157,189 @@ class MageMakerApp(Adw.Application):
     
     def new_character(self):
         """Create a new character."""
+        self.autosave.flush()
         self.current_character = Character()
-        self.current_filepath = None
+        self.current_key = None
+        self.history.clear()
+        self.char_list.clear_selection()
         self.editor.load_character(self.current_character)
         self.update_tracker()
-    
-    def load_character(self, filepath: str):
-        """Load a character from file."""
+        self.update_history_actions()
+    
+    def run_in_background(self, status: str, func, *args, on_done=None,
+                          on_finally=None, error_heading: str = "Error"):
+        """Run func(*args) on the I/O worker thread.
+        on_done(result), on_finally() and error dialogs are dispatched on
+        the GTK main loop."""
+        self._set_busy(1, status)
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(
+            lambda f: GLib.idle_add(self._on_background_done, f, on_done,
+                                    on_finally, error_heading))
+        return future
+    
+    def _on_background_done(self, future, on_done, on_finally, error_heading):
+        self._set_busy(-1)
         try:
-            self.current_character = Character.load_from_markdown(filepath)
-            self.current_filepath = filepath
+            result = future.result()
+        except Exception as e:
+            self.show_error(error_heading, str(e))
+        else:
+            if on_done:
+                on_done(result)
+        finally:
+            if on_finally:
+                on_finally()
+        return GLib.SOURCE_REMOVE
+    
+    def _set_busy(self, delta: int, status: str = ""):
+        self._busy_count += delta
+        if self._busy_count > 0:
+            self.spinner.set_tooltip_text(status or None)
+            self.spinner.start()
+        else:
+            self.spinner.set_tooltip_text(None)
+            self.spinner.stop()
+    
+    def show_toast(self, message: str):
+        self.toast_overlay.add_toast(Adw.Toast(title=message))
+    
+    def show_error(self, heading: str, body: str):
+        dialog = Adw.MessageDialog(
+            transient_for=self.win,
+            heading=heading,
+            body=body
+        )
+        dialog.add_response("ok", "OK")
+        dialog.present()
+    
+    def character_changed(self):
+        """Called by the editor and tracker whenever the model changes."""
+        self.autosave.notify_changed()
+        self.update_history_actions()
+    
+    def update_history_actions(self):
+        self.undo_action.set_enabled(self.history.can_undo)
+        self.redo_action.set_enabled(self.history.can_redo)
+    
+    def _on_undo(self, action, param):
+        record = self.history.undo(self.current_character)
+        if record is not None:
+            self._history_applied(record.trait_type, record.trait_name, record.old_value)
+    
+    def _on_redo(self, action, param):
+        reason = self.history.check_redo(self.current_character)
+        if reason:
+            self.show_toast(reason)
+            return
+        record = self.history.redo(self.current_character)
+        if record is not None:
+            self._history_applied(record.trait_type, record.trait_name, record.new_value)
+    
+    def _history_applied(self, trait_type: str, trait_name: str, value: int):
+        self.editor.show_trait(trait_type, trait_name, value)
+        self.update_tracker()
+        self.character_changed()
+    
+    def load_character(self, key: str):
+        """Load a character from the store."""
+        # Queue the outgoing character's pending autosave ahead of the load
+        self.autosave.flush()
+        
+        def on_loaded(character):
+            # The editor stayed live during the load; save any edits made
+            # meanwhile to the outgoing character before replacing it
+            self.autosave.flush()
+            self.current_character = character
+            self.current_key = key
+            self.history.clear()
             self.editor.load_character(self.current_character)
             self.update_tracker()
-        except Exception as e:
-            dialog = Adw.MessageDialog(
-                transient_for=self.win,
-                heading="Error Loading Character",
-                body=str(e)
-            )
-            dialog.add_response("ok", "OK")
-            dialog.present()
+            self.update_history_actions()
+            
+            missing = sidecar.missing_texts(character)
+            if missing:
+                self.show_error(
+                    "Some Text Is Missing",
+                    "These text files could not be found, so the notes or avatar "
+                    "description they hold are shown empty. Saving keeps the link "
+                    "to them; put them back to restore the text:\n\n" + "\n".join(missing))
+        
+        self.run_in_background("Loading character…", self.store.load,
+                               key, on_done=on_loaded,
+                               error_heading="Error Loading Character")
     
     def _on_save(self, button):
         """Save current character."""
+        self.autosave.cancel()
+        self.save_current()
+    
+    def save_current(self, quiet: bool = False, on_finished=None):
+        """Save the current character in the background.
+        quiet suppresses toasts (used by autosave); on_finished() runs
+        after the write completes or fails."""
         if not self.current_character:
+            if on_finished:
+                on_finished()
             return
         
-        if not self.current_filepath:
-            # Generate filename from character name
-            safe_name = "".join(c for c in self.current_character.name if c.isalnum() or c in " -_").strip()
-            if not safe_name:
-                safe_name = "New Character"
-            self.current_filepath = os.path.join(self.save_directory, f"{safe_name}.M20")
+        if not self.current_key:
+            self.current_key = self.store.new_key(self.current_character)
         
-        try:
-            self.current_character.save_to_markdown(self.current_filepath)
-            self.char_list.refresh_list()
-            
-            # Show toast
-            toast = Adw.Toast(title="Character saved!")
-            # Note: We'd need an AdwToastOverlay for this, simplified for now
-        except Exception as e:
-            dialog = Adw.MessageDialog(
-                transient_for=self.win,
-                heading="Error Saving Character",
-                body=str(e)
-            )
-            dialog.add_response("ok", "OK")
-            dialog.present()
+        # Save a snapshot so edits made meanwhile cannot race the writer
+        character = self.current_character
+        key = self.current_key
+        snapshot = character.snapshot()
+        
+        def on_saved(written):
+            if not written:
+                if not quiet:
+                    self.show_toast("No changes to save")
+                return
+            character.modified_date = snapshot.modified_date
+            # Edits made during the write keep the live character dirty
+            character.mark_saved(snapshot._saved_hash, snapshot._saved_path)
+            self.char_list.update_entry(key)
+            if not quiet:
+                self.show_toast("Character saved!")
+        
+        self.run_in_background("Saving character…", self.store.save,
+                               snapshot, key, on_done=on_saved, on_finally=on_finished,
+                               error_heading="Error Saving Character")
     
     def _on_export(self, button):
-        """Export character to TXT."""
+        """Export character; the format follows the chosen file extension."""
         if not self.current_character:
             return
         
         dialog = Gtk.FileDialog()
         dialog.set_initial_name(f"{self.current_character.name}.txt")
+        snapshot = self.current_character.snapshot()
         
         def on_save_response(dialog, result):
             try:
                 file = dialog.save_finish(result)
-                if file:
-                    filepath = file.get_path()
-                    self.current_character.export_to_text(filepath)
             except GLib.Error:
-                pass  # User cancelled
+                return  # User cancelled
+            if file:
+                self.run_in_background("Exporting character…", snapshot.export,
+                                       file.get_path(),
+                                       on_done=lambda r: self.show_toast("Character exported!"),
+                                       error_heading="Error Exporting Character")
         
         dialog.save(self.win, None, on_save_response)
     
+    def _on_close_request(self, window):
+        # Queue unsaved edits; shutdown waits for the worker to finish them
+        self.autosave.flush()
+        return False
+    
+    def _on_shutdown(self, app):
+        # Let queued saves finish and reach the disk before the process exits
+        self.executor.shutdown(wait=True)
+        self.store.close()
+        fileio.flush_pending()
+    
     def update_tracker(self):
         """Update the progress tracker."""
         self.tracker.update()
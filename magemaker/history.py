@@ -0,0 +1,153 @@
+"""
+Undo/redo history for trait changes
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+from . import ledger
+from .character import Character, ChangeResult, TRAIT_HANDLERS
+
+
+@dataclass(slots=True)
+class ChangeRecord:
+    """One undoable trait change and the points it charged."""
+    
+    trait_type: str
+    trait_name: str
+    old_value: int
+    new_value: int
+    freebie_cost: int = 0
+    xp_cost: int = 0
+    old_cap: Optional[int] = None   # capped field (willpower_current) before the change
+    new_cap: Optional[int] = None   # and after it
+    time: float = 0.0               # monotonic time of the latest merged change
+
+
+class UndoHistory:
+    """Bounded undo/redo stacks of ChangeRecords.
+    Changes to the same trait within coalesce_seconds of each other merge
+    into one record, so a burst of clicks on one dot row undoes at once."""
+    
+    DEFAULT_LIMIT = 500
+    DEFAULT_COALESCE_SECONDS = 1.0
+    
+    def __init__(self, limit: int = DEFAULT_LIMIT,
+                 coalesce_seconds: float = DEFAULT_COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self._undo = deque(maxlen=limit)  # oldest records fall off the end
+        self._redo = []
+    
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+    
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+    
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+    
+    def clear_redo(self):
+        """Drop undone changes, e.g. after an edit made outside the history
+        that redoing them could contradict."""
+        self._redo.clear()
+    
+    def apply_change(self, character: Character, trait_type: str, trait_name: str,
+                     new_value: int, override: bool = False) -> ChangeResult:
+        """Character.apply_change, recording the change if it was applied."""
+        handler = TRAIT_HANDLERS.get(trait_type)
+        old_cap = None
+        if handler is not None and handler.cap_field:
+            old_cap = getattr(character, handler.cap_field)
+        
+        result = character.apply_change(trait_type, trait_name, new_value, override)
+        new_cap = getattr(character, handler.cap_field) if old_cap is not None else None
+        if result.applied and (result.old_value != result.new_value or new_cap != old_cap):
+            self.record(ChangeRecord(
+                trait_type, trait_name, result.old_value, result.new_value,
+                freebie_cost=result.cost if result.currency == "freebie" else 0,
+                xp_cost=result.cost if result.currency == "xp" else 0,
+                old_cap=old_cap, new_cap=new_cap, time=time.monotonic()))
+        return result
+    
+    def record(self, record: ChangeRecord):
+        """Push a change, merging it into the previous one where possible."""
+        self._redo.clear()
+        
+        last = self._undo[-1] if self._undo else None
+        if (last is not None and
+                last.trait_type == record.trait_type and
+                last.trait_name == record.trait_name and
+                last.new_value == record.old_value and
+                record.time - last.time <= self.coalesce_seconds):
+            last.new_value = record.new_value
+            last.new_cap = record.new_cap
+            last.freebie_cost += record.freebie_cost
+            last.xp_cost += record.xp_cost
+            last.time = record.time
+            if (last.new_value == last.old_value and last.new_cap == last.old_cap and
+                    not last.freebie_cost and not last.xp_cost):
+                self._undo.pop()  # The burst cancelled itself out
+            return
+        
+        self._undo.append(record)
+    
+    def undo(self, character: Character) -> Optional[ChangeRecord]:
+        """Revert the latest change and refund its points."""
+        if not self._undo:
+            return None
+        record = self._undo.pop()
+        
+        character.set_trait(record.trait_type, record.trait_name, record.old_value)
+        if record.old_cap is not None:
+            setattr(character, TRAIT_HANDLERS[record.trait_type].cap_field, record.old_cap)
+        if record.xp_cost:
+            character.record_experience(ledger.refund_entry(
+                record.trait_type, record.trait_name, record.new_value,
+                record.old_value, record.xp_cost))
+        character.freebie_points_spent -= record.freebie_cost
+        character.experience_spent -= record.xp_cost
+        
+        self._redo.append(record)
+        return record
+    
+    def check_redo(self, character: Character) -> str:
+        """Why the latest undone change can't be redone, or "" if it can.
+        Points may have been spent outside the history since it was undone,
+        e.g. on merits and flaws."""
+        if not self._redo:
+            return ""
+        record = self._redo[-1]
+        if record.freebie_cost > 0 and record.freebie_cost > character.freebie_points_available:
+            return (f"Need {record.freebie_cost} freebie points, but only "
+                    f"{character.freebie_points_available} available.")
+        if record.xp_cost > 0 and record.xp_cost > character.experience_available:
+            return (f"Need {record.xp_cost} XP, but only "
+                    f"{character.experience_available} available.")
+        return ""
+    
+    def redo(self, character: Character) -> Optional[ChangeRecord]:
+        """Reapply the latest undone change and charge its points again.
+        Returns None, leaving the change undone, if check_redo() refuses it."""
+        if not self._redo or self.check_redo(character):
+            return None
+        record = self._redo.pop()
+        
+        character.set_trait(record.trait_type, record.trait_name, record.new_value)
+        if record.new_cap is not None:
+            setattr(character, TRAIT_HANDLERS[record.trait_type].cap_field, record.new_cap)
+        if record.xp_cost:
+            character.record_experience(ledger.purchase_entry(
+                record.trait_type, record.trait_name, record.old_value,
+                record.new_value, record.xp_cost))
+        character.freebie_points_spent += record.freebie_cost
+        character.experience_spent += record.xp_cost
+        
+        # Redone records never merge with later clicks
+        record.time = float("-inf")
+        self._undo.append(record)
+        return record
@@ -0,0 +1,135 @@
+"""
+Append-only experience ledger stored in Character.experience_log
+
+Entries are plain dicts so they serialize with the rest of the character:
+
+    {"type": "award", "amount": 5, "note": "...", "time": ...}
+    {"type": "purchase", "trait": "sphere:Forces", "from": 2, "to": 3, "cost": 16, "time": ...}
+    {"type": "refund", "trait": "sphere:Forces", "from": 3, "to": 2, "cost": 16, "time": ...}
+    {"type": "checkpoint", "total": 40, "spent": 36, "traits": {...}, "time": ...}
+
+A checkpoint carries the full balance, so replaying only needs the entries
+after the last one. The first checkpoint opens the ledger with whatever
+balance the character had before anything was recorded.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+# Non-checkpoint entries between automatic checkpoints
+CHECKPOINT_INTERVAL = 50
+
+
+@dataclass
+class LedgerState:
+    """Balances replayed from the ledger."""
+    
+    total: int = 0
+    spent: int = 0
+    # "trait_type:name" -> [rating reached, XP spent on it]
+    traits: dict = field(default_factory=dict)
+    
+    @property
+    def available(self) -> int:
+        return self.total - self.spent
+
+
+def trait_key(trait_type: str, trait_name: str) -> str:
+    return f"{trait_type}:{trait_name}"
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def award_entry(amount: int, note: str = "") -> dict:
+    return {"type": "award", "amount": amount, "note": note, "time": _now()}
+
+
+def purchase_entry(trait_type: str, trait_name: str, old_value: int, new_value: int,
+                   cost: int) -> dict:
+    return {"type": "purchase", "trait": trait_key(trait_type, trait_name),
+            "from": old_value, "to": new_value, "cost": cost, "time": _now()}
+
+
+def refund_entry(trait_type: str, trait_name: str, old_value: int, new_value: int,
+                 cost: int) -> dict:
+    """Entry reversing a purchase; old_value is the rating being undone."""
+    return {"type": "refund", "trait": trait_key(trait_type, trait_name),
+            "from": old_value, "to": new_value, "cost": cost, "time": _now()}
+
+
+def _checkpoint_entry(state: LedgerState) -> dict:
+    return {"type": "checkpoint", "total": state.total, "spent": state.spent,
+            "traits": {key: list(value) for key, value in state.traits.items()},
+            "time": _now()}
+
+
+def _last_checkpoint(log: list) -> int:
+    """Index of the latest checkpoint, or -1. Scans back from the end."""
+    for index in range(len(log) - 1, -1, -1):
+        entry = log[index]
+        if isinstance(entry, dict) and entry.get("type") == "checkpoint":
+            return index
+    return -1
+
+
+def _apply(state: LedgerState, entry: dict):
+    kind = entry.get("type")
+    if kind == "checkpoint":
+        state.total = entry.get("total", 0)
+        state.spent = entry.get("spent", 0)
+        state.traits = {key: list(value) for key, value in entry.get("traits", {}).items()}
+    elif kind == "award":
+        state.total += entry.get("amount", 0)
+    elif kind in ("purchase", "refund"):
+        cost = entry.get("cost", 0)
+        if kind == "refund":
+            cost = -cost
+        state.spent += cost
+        spent_on_trait = state.traits.get(entry.get("trait"), [0, 0])[1]
+        state.traits[entry.get("trait")] = [entry.get("to", 0), spent_on_trait + cost]
+
+
+def replay(log: list) -> LedgerState:
+    """Recompute balances from the latest checkpoint onwards."""
+    state = LedgerState()
+    for entry in log[max(_last_checkpoint(log), 0):]:
+        if isinstance(entry, dict):
+            _apply(state, entry)
+    return state
+
+
+def open_ledger(log: list, total: int, spent: int):
+    """Start an empty ledger from the character's current balance."""
+    if not log:
+        log.append(_checkpoint_entry(LedgerState(total, spent)))
+
+
+def append(log: list, entry: dict):
+    """Add an entry, checkpointing every CHECKPOINT_INTERVAL entries."""
+    log.append(entry)
+    if len(log) - 1 - _last_checkpoint(log) >= CHECKPOINT_INTERVAL:
+        log.append(_checkpoint_entry(replay(log)))
+
+
+def trait_history(log: list, trait_type: str, trait_name: str) -> list:
+    """All purchase and refund entries for one trait, oldest first.
+    Scans the whole ledger; use replay() for the current totals."""
+    key = trait_key(trait_type, trait_name)
+    return [entry for entry in log
+            if isinstance(entry, dict) and entry.get("trait") == key]
+
+
+def audit(log: list, total: int, spent: int) -> list[str]:
+    """Compare the ledger with a character's balance. Returns the mismatches."""
+    if not log:
+        return []
+    state = replay(log)
+    problems = []
+    if state.total != total:
+        problems.append(f"Total XP is {total}, ledger says {state.total}")
+    if state.spent != spent:
+        problems.append(f"Spent XP is {spent}, ledger says {state.spent}")
+    return problems
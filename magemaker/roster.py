@@ -0,0 +1,149 @@
+"""
+Persistent roster index for the character save directory
+"""
+
+import json
+import os
+from typing import Optional
+from dataclasses import asdict
+from .character import Character
+from .fileio import atomic_write, DURABILITY_NONE
+
+
+INDEX_FILENAME = ".roster_index.json"
+INDEX_VERSION = 3
+CHARACTER_EXTENSIONS = (".M20", ".M20b")
+
+
+class RosterIndex:
+    """On-disk cache of character summaries keyed by path, mtime and size."""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self.entries = {}  # filename -> summary entry
+        self._dirty = False
+        self._load()
+    
+    def _load(self):
+        """Load the index file, discarding it if missing or outdated."""
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return
+        
+        entries = data.get("entries", {})
+        if isinstance(entries, dict):
+            self.entries = entries
+    
+    def save(self):
+        """Write the index back to disk if anything changed.
+        Safe to call from a worker thread while the main thread updates
+        entries: it writes a copy, and later updates mark it dirty again."""
+        if not self._dirty:
+            return
+        
+        # Entries are replaced, never changed in place, so a shallow copy
+        # is a consistent snapshot
+        self._dirty = False
+        data = {"version": INDEX_VERSION, "entries": dict(self.entries)}
+        try:
+            # The index is only a cache, so it never pays for an fsync
+            atomic_write(self.index_path, json.dumps(data, separators=(",", ":")),
+                         DURABILITY_NONE)
+        except OSError:
+            # Read-only or shared folders still work, just without the cache
+            pass
+    
+    def _parse(self, filepath: str, stat: os.stat_result) -> dict:
+        """Build a fresh index entry by parsing the character file."""
+        entry = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+        try:
+            entry.update(asdict(Character.load_summary(filepath)))
+        except Exception:
+            entry["name"] = os.path.splitext(os.path.basename(filepath))[0]
+        return entry
+    
+    def _is_current(self, entry: dict, stat: os.stat_result) -> bool:
+        return (entry is not None and
+                entry.get("mtime") == stat.st_mtime_ns and
+                entry.get("size") == stat.st_size)
+    
+    def refresh(self) -> list:
+        """Rescan the directory, re-parsing only changed files.
+        Returns the entries sorted by filename."""
+        self.poll()
+        return self.list_entries()
+    
+    def poll(self) -> tuple[list, list]:
+        """Rescan the directory and report what changed since the last scan.
+        Returns (updated entries, removed paths)."""
+        if not os.path.isdir(self.directory):
+            return [], []
+        
+        updated = []
+        seen = set()
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(CHARACTER_EXTENSIONS):
+                    continue
+                if not dir_entry.is_file():
+                    continue
+                seen.add(dir_entry.name)
+                stat = dir_entry.stat()
+                if not self._is_current(self.entries.get(dir_entry.name), stat):
+                    entry = self._parse(dir_entry.path, stat)
+                    self.entries[dir_entry.name] = entry
+                    updated.append(self._with_path(dir_entry.name, entry))
+                    self._dirty = True
+        
+        removed = []
+        for filename in list(self.entries):
+            if filename not in seen:
+                del self.entries[filename]
+                removed.append(os.path.join(self.directory, filename))
+                self._dirty = True
+        
+        self.save()
+        return updated, removed
+    
+    def update_path(self, filepath: str) -> Optional[dict]:
+        """Refresh the entry for a single file. Returns None if it is gone.
+        Like remove_path, this doesn't write the index; call save() once a
+        burst of changes is over."""
+        filename = os.path.basename(filepath)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            self.remove_path(filepath)
+            return None
+        
+        entry = self.entries.get(filename)
+        if not self._is_current(entry, stat):
+            entry = self._parse(filepath, stat)
+            self.entries[filename] = entry
+            self._dirty = True
+        return self._with_path(filename, entry)
+    
+    def remove_path(self, filepath: str):
+        """Drop the entry for a deleted file."""
+        filename = os.path.basename(filepath)
+        if self.entries.pop(filename, None) is not None:
+            self._dirty = True
+    
+    def list_entries(self) -> list:
+        """Get all cached entries sorted by filename, with full paths."""
+        return [self._with_path(filename, self.entries[filename])
+                for filename in sorted(self.entries)]
+    
+    def _with_path(self, filename: str, entry: dict) -> dict:
+        result = dict(entry)
+        result["path"] = os.path.join(self.directory, filename)
+        return result
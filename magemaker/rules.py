@@ -0,0 +1,122 @@
+"""
+Precomputed cost tables for trait purchases
+
+Built once at import from the cost tables in data.py, so pricing any
+purchase is a table lookup instead of a per-dot loop.
+"""
+
+from types import MappingProxyType
+from .data import BACKGROUNDS, FREEBIE_COSTS, EXPERIENCE_COSTS
+
+
+# Ratings covered by the cumulative tables; higher ones use the closed form
+MAX_TABLE_RATING = 10
+
+# Backgrounds that cost two creation dots or freebies per dot
+DOUBLE_COST_BACKGROUNDS = frozenset(name for name, _ in BACKGROUNDS["double_cost"])
+
+# Freebie points per dot for traits priced linearly
+FREEBIE_DOT_COSTS = MappingProxyType({
+    trait_type: FREEBIE_COSTS[trait_type]
+    for trait_type in ("attribute", "ability", "background", "sphere", "arete", "willpower")
+})
+
+# Quintessence costs 1 freebie point per 4 dots, paid on reaching each multiple
+QUINTESSENCE_FREEBIE_STEP = 4
+MAX_QUINTESSENCE = 20
+
+# Cumulative freebie points for 0..MAX_QUINTESSENCE dots of Quintessence
+QUINTESSENCE_FREEBIE_TABLE = tuple(
+    dots // QUINTESSENCE_FREEBIE_STEP for dots in range(MAX_QUINTESSENCE + 1))
+
+# Trait types priced at (new rating x multiplier) per dot, and the
+# EXPERIENCE_COSTS key for the multiplier. Spheres depend on affinity.
+_XP_MULTIPLIERS = {
+    ("attribute", False): "attribute",
+    ("ability", False): "ability",
+    ("sphere", False): "other_sphere",
+    ("sphere", True): "affinity_sphere",
+    ("arete", False): "arete",
+    ("background", False): "background",
+    ("willpower", False): "willpower",
+}
+
+# Trait types whose first dot has a flat price instead
+_XP_FIRST_DOT = {
+    "ability": "new_ability",
+    "sphere": "new_sphere",
+}
+
+
+def _triangle(n: int) -> int:
+    """1 + 2 + ... + n"""
+    return n * (n + 1) // 2
+
+
+def _xp_cost_closed_form(trait_type: str, affinity: bool, old_value: int,
+                         new_value: int) -> int:
+    """XP to raise a trait from old_value to new_value, 0 <= old < new."""
+    multiplier = EXPERIENCE_COSTS[_XP_MULTIPLIERS[(trait_type, affinity)]]
+    first_dot = _XP_FIRST_DOT.get(trait_type)
+    if first_dot is not None and old_value == 0:
+        return EXPERIENCE_COSTS[first_dot] + multiplier * (_triangle(new_value) - 1)
+    return multiplier * (_triangle(new_value) - _triangle(old_value))
+
+
+def _build_xp_tables() -> dict:
+    """Cumulative XP from 0 dots to each rating, per (trait_type, affinity)."""
+    return {
+        key: tuple(_xp_cost_closed_form(*key, 0, rating) if rating else 0
+                   for rating in range(MAX_TABLE_RATING + 1))
+        for key in _XP_MULTIPLIERS
+    }
+
+
+XP_CUMULATIVE = _build_xp_tables()
+
+
+def xp_cost(trait_type: str, old_value: int, new_value: int,
+            affinity: bool = False) -> int:
+    """XP cost of raising a trait from old_value to new_value.
+    affinity marks the character's affinity sphere. Decreases and trait
+    types that cannot be bought with XP cost 0."""
+    if new_value <= old_value:
+        return 0
+    
+    key = (trait_type, affinity and trait_type == "sphere")
+    table = XP_CUMULATIVE.get(key)
+    if table is None:
+        return 0
+    
+    old_value = max(old_value, 0)
+    if new_value <= MAX_TABLE_RATING:
+        return table[new_value] - table[old_value]
+    return _xp_cost_closed_form(*key, old_value, new_value)
+
+
+def background_dot_multiplier(name: str) -> int:
+    """Creation dots or freebie multiples each dot of a background costs."""
+    return 2 if name in DOUBLE_COST_BACKGROUNDS else 1
+
+
+def _quintessence_freebies(dots: int) -> int:
+    if 0 <= dots <= MAX_QUINTESSENCE:
+        return QUINTESSENCE_FREEBIE_TABLE[dots]
+    return dots // QUINTESSENCE_FREEBIE_STEP
+
+
+def freebie_cost(trait_type: str, trait_name: str, old_value: int, new_value: int) -> int:
+    """Freebie point cost of raising a trait from old_value to new_value.
+    Decreases and trait types without a freebie price cost 0."""
+    if new_value <= old_value:
+        return 0
+    
+    if trait_type == "quintessence":
+        return _quintessence_freebies(new_value) - _quintessence_freebies(old_value)
+    
+    dot_cost = FREEBIE_DOT_COSTS.get(trait_type)
+    if dot_cost is None:
+        return 0
+    if trait_type == "background":
+        dot_cost *= background_dot_multiplier(trait_name)
+    return (new_value - old_value) * dot_cost
@@ -0,0 +1,214 @@
+"""
+Declared schema and version migrations for saved character data
+
+Character.to_dict() stamps SCHEMA_VERSION into every save. Character.from_dict
+runs older data through the upgrade steps in MIGRATIONS, then checks and
+coerces each field with the checkers in CHARACTER_SCHEMA. Saves without a
+version predate versioning and count as version 1.
+"""
+
+from typing import Optional
+from .vectors import Baseline
+
+
+SCHEMA_VERSION = 3
+
+
+class CharacterSchemaError(ValueError):
+    """Raised when saved data can't be read as a character."""
+
+
+def _describe(value) -> str:
+    text = repr(value)
+    return text if len(text) <= 40 else text[:37] + "..."
+
+
+def _fail(path: str, expected: str, value):
+    raise CharacterSchemaError(f"{path}: expected {expected}, got {_describe(value)}")
+
+
+# Checkers take (value, path) and return the coerced value or raise
+
+def text(value, path: str) -> str:
+    if type(value) is str:
+        return value
+    if value is None:
+        return ""
+    if type(value) in (int, float):
+        return str(value)
+    _fail(path, "text", value)
+
+
+def integer(value, path: str) -> int:
+    if type(value) is int:
+        return value
+    if type(value) is bool:
+        return int(value)
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is str:
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    _fail(path, "a whole number", value)
+
+
+def flag(value, path: str) -> bool:
+    if type(value) is bool:
+        return value
+    if type(value) is int and value in (0, 1):
+        return bool(value)
+    _fail(path, "true or false", value)
+
+
+def anything(value, path: str):
+    return value
+
+
+def optional(check):
+    """Checker allowing None as well as whatever check accepts."""
+    def check_optional(value, path: str):
+        return None if value is None else check(value, path)
+    return check_optional
+
+
+def mapping(check_value, exact: Optional[type] = None):
+    """Checker for a dict of name -> value; returns a new dict.
+    Values of type exact, which check_value returns unchanged, are taken
+    as they are without calling it."""
+    def check_mapping(value, path: str) -> dict:
+        if type(value) is not dict:
+            _fail(path, "a mapping", value)
+        checked = {}
+        for key, item in value.items():
+            if type(key) is not str:
+                _fail(path, "text keys", key)
+            checked[key] = item if type(item) is exact else check_value(item, f"{path}.{key}")
+        return checked
+    return check_mapping
+
+
+def sequence(check_item, exact: Optional[type] = None):
+    """Checker for a list; returns a new list. exact is as for mapping()."""
+    def check_sequence(value, path: str) -> list:
+        if type(value) not in (list, tuple):
+            _fail(path, "a list", value)
+        return [item if type(item) is exact else check_item(item, f"{path}[{i}]")
+                for i, item in enumerate(value)]
+    return check_sequence
+
+
+def baseline(value, path: str) -> Baseline:
+    """Checker for a saved vectors.Baseline: a rating list (null = none) per
+    trait type, and a rating for each "type:name" key (or legacy core
+    trait key, which is dropped).
+    Returns the Baseline itself, since building it checks every value."""
+    if type(value) is not dict:
+        _fail(path, "a mapping", value)
+    try:
+        return Baseline.from_data(value)
+    except ValueError as e:
+        key, expected, got = e.args
+        _fail(path if key is None else f"{path}.{key}", expected, got)
+
+
+# Saved field -> checker
+CHARACTER_SCHEMA = {
+    "name": text,
+    "player": text,
+    "chronicle": text,
+    "concept": text,
+    "faction": text,
+    "group": text,
+    "essence": text,
+    "nature": text,
+    "demeanor": text,
+    "attributes": mapping(integer, int),
+    "attribute_priorities": mapping(optional(text)),
+    "ability_priorities": mapping(optional(text)),
+    "abilities": mapping(integer, int),
+    "specialties": mapping(sequence(text, str)),
+    "spheres": mapping(integer, int),
+    "affinity_sphere": text,
+    "backgrounds": mapping(integer, int),
+    "arete": integer,
+    "willpower": integer,
+    "willpower_current": integer,
+    "quintessence": integer,
+    "paradox": integer,
+    "health_levels": mapping(flag, bool),
+    "merits": mapping(integer, int),
+    "flaws": mapping(integer, int),
+    "experience_total": integer,
+    "experience_spent": integer,
+    "experience_log": sequence(anything),  # ledger.py skips entries it can't read
+    "creation_mode": text,
+    "freebie_points_spent": integer,
+    "creation_baselines": baseline,
+    "freebie_baselines": baseline,
+    "created_date": text,
+    "modified_date": text,
+    "notes": text,
+    "paradigm": text,
+    "practice": text,
+    "instruments": sequence(text, str),
+    "avatar_description": text,
+}
+
+
+# Upgrade steps: version -> function turning that version's data into the
+# next version's. Each gets its own copy of the data and may edit it.
+
+def _compact_baselines(data: dict) -> dict:
+    """1 -> 2: baselines move from flat "type:name" dicts to rating vectors."""
+    for key in ("creation_baselines", "freebie_baselines"):
+        if type(data.get(key)) is dict:
+            data[key] = baseline(data[key], key).to_data()
+    return data
+
+
+def _allow_text_refs(data: dict) -> dict:
+    """2 -> 3: long text may move to sidecar files (sidecar.py). Older data
+    keeps its text inline, which is still valid."""
+    return data
+
+
+MIGRATIONS = {
+    1: _compact_baselines,
+    2: _allow_text_refs,
+}
+
+
+def _compile_chains() -> dict:
+    """Version -> tuple of the upgrade steps that bring it to SCHEMA_VERSION."""
+    return {
+        version: tuple(MIGRATIONS[step] for step in range(version, SCHEMA_VERSION))
+        for version in range(1, SCHEMA_VERSION + 1)
+    }
+
+
+UPGRADE_CHAINS = _compile_chains()
+
+
+def migrate(data) -> dict:
+    """Bring saved data up to SCHEMA_VERSION. The input is never modified;
+    current data comes back as is."""
+    if type(data) is not dict:
+        _fail("character", "a mapping", data)
+    
+    version = data.get("schema_version", 1)
+    if type(version) is not int or version < 1:
+        _fail("schema_version", "a version number", version)
+    chain = UPGRADE_CHAINS.get(version)
+    if chain is None:
+        raise CharacterSchemaError(
+            f"Saved with a newer schema version ({version}); "
+            f"this version reads up to {SCHEMA_VERSION}")
+    
+    if chain:
+        data = dict(data)
+        for step in chain:
+            data = step(data)
+        data["schema_version"] = SCHEMA_VERSION
+    return data
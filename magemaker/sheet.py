@@ -0,0 +1,260 @@
+"""
+Section-cached Markdown sheet for .M20 files
+
+The readable sheet is built from the sections in SECTIONS. Each one
+declares the Character fields it shows, and SectionCache keeps the text of
+every section with a fingerprint of those fields, so a save only
+re-renders the sections whose fields changed since the last one.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+from . import sidecar
+from .data import ATTRIBUTES, SPHERES
+from .vectors import TraitVector
+
+
+FILLED_DOT = "●"
+EMPTY_DOT = "○"
+
+# Dot strings for ratings 0..10 out of 5 and out of 10
+_DOT_STRINGS = {
+    width: tuple(FILLED_DOT * rating + EMPTY_DOT * (width - rating)
+                 for rating in range(11))
+    for width in (5, 10)
+}
+
+
+def dot_string(rating: int, width: int = 5) -> str:
+    """Rating as filled and empty dots, e.g. ●●●○○"""
+    table = _DOT_STRINGS.get(width)
+    if table is not None and 0 <= rating < len(table):
+        return table[rating]
+    return FILLED_DOT * rating + EMPTY_DOT * (width - rating)
+
+
+def _sidecar_link(digest: str) -> str:
+    """Sheet line standing in for text saved in a sidecar file."""
+    return f"*Saved in {sidecar.SIDECAR_DIRNAME}/{digest}{sidecar.SIDECAR_EXTENSION}*"
+
+
+def _render_title(char, text_refs: dict) -> list:
+    return [f"# {char.name}", ""]
+
+
+def _render_identity(char, text_refs: dict) -> list:
+    return [
+        "## Identity",
+        f"- **Player:** {char.player}",
+        f"- **Chronicle:** {char.chronicle}",
+        f"- **Concept:** {char.concept}",
+        f"- **Faction:** {char.faction}",
+        f"- **Group:** {char.group}",
+        f"- **Essence:** {char.essence}",
+        f"- **Nature:** {char.nature}",
+        f"- **Demeanor:** {char.demeanor}",
+        "",
+    ]
+
+
+def _specialty_suffix(specialties: dict, key: str) -> str:
+    if key in specialties:
+        return f" ({', '.join(specialties[key])})"
+    return ""
+
+
+def _render_attributes(char, text_refs: dict) -> list:
+    lines = ["## Attributes"]
+    for category, attrs in ATTRIBUTES.items():
+        lines.append(f"### {category}")
+        for attr in attrs:
+            dots = dot_string(char.attributes.get(attr, 1))
+            spec = _specialty_suffix(char.specialties, f"attribute:{attr}")
+            lines.append(f"- **{attr}:** {dots}{spec}")
+        lines.append("")
+    return lines
+
+
+def _render_abilities(char, text_refs: dict) -> list:
+    lines = ["## Abilities"]
+    abilities_by_category = char.get_abilities_by_category()
+    for category in ["Talents", "Skills", "Knowledges"]:
+        lines.append(f"### {category}")
+        for ability in sorted(abilities_by_category[category]):
+            rating = char.abilities[ability]
+            if rating > 0:
+                spec = _specialty_suffix(char.specialties, ability)
+                lines.append(f"- **{ability}:** {dot_string(rating)}{spec}")
+        lines.append("")
+    return lines
+
+
+def _render_spheres(char, text_refs: dict) -> list:
+    lines = ["## Spheres", f"**Affinity Sphere:** {char.affinity_sphere}", ""]
+    for sphere in SPHERES:
+        rating = char.spheres.get(sphere, 0)
+        if rating > 0:
+            affinity = " (Affinity)" if sphere == char.affinity_sphere else ""
+            lines.append(f"- **{sphere}:** {dot_string(rating)}{affinity}")
+    lines.append("")
+    return lines
+
+
+def _render_backgrounds(char, text_refs: dict) -> list:
+    lines = ["## Backgrounds"]
+    for bg, rating in sorted(char.backgrounds.items()):
+        if rating > 0:
+            lines.append(f"- **{bg}:** {dot_string(rating)}")
+    lines.append("")
+    return lines
+
+
+def _render_core_traits(char, text_refs: dict) -> list:
+    return [
+        "## Core Traits",
+        f"- **Arete:** {dot_string(char.arete, 10)}",
+        f"- **Willpower:** {dot_string(char.willpower, 10)} (Current: {char.willpower_current})",
+        f"- **Quintessence:** {char.quintessence}",
+        f"- **Paradox:** {char.paradox}",
+        "",
+    ]
+
+
+def _render_merits_flaws(char, text_refs: dict) -> list:
+    if not char.merits and not char.flaws:
+        return []
+    lines = ["## Merits and Flaws"]
+    if char.merits:
+        lines.append("### Merits")
+        for merit, cost in sorted(char.merits.items()):
+            lines.append(f"- {merit} ({cost} pts)")
+    if char.flaws:
+        lines.append("### Flaws")
+        for flaw, bonus in sorted(char.flaws.items()):
+            lines.append(f"- {flaw} ({bonus} pts)")
+    lines.append("")
+    return lines
+
+
+def _render_focus(char, text_refs: dict) -> list:
+    instruments = ', '.join(char.instruments) if char.instruments else 'None'
+    return [
+        "## Focus",
+        f"- **Paradigm:** {char.paradigm}",
+        f"- **Practice:** {char.practice}",
+        f"- **Instruments:** {instruments}",
+        "",
+    ]
+
+
+def _render_text(name: str, heading: str) -> Callable:
+    """Renderer for a free-text section, linking to its sidecar if saved in one."""
+    def render(char, text_refs: dict) -> list:
+        if name in text_refs:
+            return [heading, _sidecar_link(text_refs[name]), ""]
+        text = getattr(char, name)
+        return [heading, text, ""] if text else []
+    return render
+
+
+def _render_experience(char, text_refs: dict) -> list:
+    return [
+        "## Experience",
+        f"- **Total:** {char.experience_total}",
+        f"- **Spent:** {char.experience_spent}",
+        f"- **Available:** {char.experience_available}",
+        "",
+    ]
+
+
+@dataclass(frozen=True)
+class Section:
+    """One part of the sheet and the Character fields it shows."""
+    
+    name: str
+    fields: tuple
+    render: Callable  # (character, text_refs) -> list of lines, [] to leave out
+
+
+SECTIONS = (
+    Section("title", ("name",), _render_title),
+    Section("identity", ("player", "chronicle", "concept", "faction", "group",
+                         "essence", "nature", "demeanor"), _render_identity),
+    Section("attributes", ("attributes", "specialties"), _render_attributes),
+    Section("abilities", ("abilities", "specialties"), _render_abilities),
+    Section("spheres", ("spheres", "affinity_sphere"), _render_spheres),
+    Section("backgrounds", ("backgrounds",), _render_backgrounds),
+    Section("core_traits", ("arete", "willpower", "willpower_current", "quintessence",
+                            "paradox"), _render_core_traits),
+    Section("merits_flaws", ("merits", "flaws"), _render_merits_flaws),
+    Section("focus", ("paradigm", "practice", "instruments"), _render_focus),
+    Section("avatar", ("avatar_description",), _render_text("avatar_description", "## Avatar")),
+    Section("experience", ("experience_total", "experience_spent"), _render_experience),
+    Section("notes", ("notes",), _render_text("notes", "## Notes")),
+)
+
+
+def _freeze(value):
+    """Immutable copy of a field value to compare against later."""
+    if isinstance(value, TraitVector):
+        return value.fingerprint()
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _fingerprint(char, section: Section, text_refs: dict) -> tuple:
+    values = []
+    for name in section.fields:
+        if name in sidecar.SIDECAR_FIELDS:
+            # Compare the stored text or reference; don't read a sidecar for it
+            values.append((sidecar.raw_text(char, name), text_refs.get(name)))
+        else:
+            values.append(_freeze(getattr(char, name)))
+    return tuple(values)
+
+
+class SectionCache:
+    """Rendered text of each section, with the fingerprint it was rendered from.
+
+    Copies made by Character.snapshot() share their original's cache, so
+    sections rendered while saving a snapshot are reused by the next save.
+    That is safe because an entry is only used when the fingerprint of the
+    character asking for it matches. Pickling starts a fresh cache.
+    """
+    
+    __slots__ = ("_entries",)
+    
+    def __init__(self):
+        self._entries = {}  # section name -> (fingerprint, text or None)
+    
+    def sections(self, char, text_refs: dict):
+        """Yield the text of each section shown, re-rendering only the
+        ones whose fields changed. Join with newlines for the full sheet."""
+        for section in SECTIONS:
+            fingerprint = _fingerprint(char, section, text_refs)
+            entry = self._entries.get(section.name)
+            if entry is None or entry[0] != fingerprint:
+                lines = section.render(char, text_refs)
+                entry = (fingerprint, "\n".join(lines) if lines else None)
+                self._entries[section.name] = entry
+            if entry[1] is not None:
+                yield entry[1]
+    
+    def render(self, char, text_refs: dict) -> str:
+        """The full sheet."""
+        return "\n".join(self.sections(char, text_refs))
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def __reduce__(self):
+        return (SectionCache, ())
@@ -0,0 +1,167 @@
+"""
+Sidecar files for long free text
+
+Notes and avatar descriptions longer than SIDECAR_THRESHOLD characters are
+saved as <folder>/.magemaker-text/<sha256>.txt next to the character file,
+and the file itself only records the hash under "text_refs". Loading leaves
+those fields as SidecarText placeholders that are read on first access, so
+listing, auditing or re-saving a character never touches the long text.
+
+Sidecars are content-addressed: unchanged text is never rewritten and
+characters with the same text share one file. Old sidecars are not deleted
+automatically, since another character may still refer to them.
+
+A character whose sidecar is missing (e.g. the file was copied without its
+folder) still loads: the field reads as empty and saves keep the reference,
+so the text comes back once the sidecar does. missing_texts() lists them.
+"""
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+from .fileio import atomic_write
+from .schema import CharacterSchemaError
+
+
+SIDECAR_FIELDS = ("notes", "avatar_description")
+SIDECAR_THRESHOLD = 4096  # characters
+SIDECAR_DIRNAME = ".magemaker-text"
+SIDECAR_EXTENSION = ".txt"
+
+# Saved-data key mapping each externalized field to its text's hash
+REFS_KEY = "text_refs"
+
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+@dataclass(frozen=True, slots=True)
+class SidecarText:
+    """Long text stored in a sidecar file and not read yet."""
+    
+    path: str
+    digest: str
+    
+    def read(self) -> str:
+        with open(self.path, encoding="utf-8", newline="") as f:
+            return f.read()
+
+
+class LazyText:
+    """Descriptor wrapped around a slot of a sidecar field.
+    A SidecarText stored in the slot is read and replaced by its text on
+    first access, or reads as "" while its file is missing; raw() returns
+    whatever the slot holds without reading."""
+    
+    __slots__ = ("slot",)
+    
+    def __init__(self, slot):
+        self.slot = slot
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, objtype)
+        if type(value) is SidecarText:
+            try:
+                value = value.read()
+            except FileNotFoundError:
+                return ""  # Keep the reference for saves (see attach)
+            self.slot.__set__(obj, value)
+        return value
+    
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+    
+    def raw(self, obj):
+        return self.slot.__get__(obj, type(obj))
+
+
+def install(cls):
+    """Make the sidecar fields of a slots class load lazily."""
+    for name in SIDECAR_FIELDS:
+        setattr(cls, name, LazyText(cls.__dict__[name]))
+
+
+def raw_text(obj, name: str):
+    """Value of a sidecar field, without reading any sidecar file."""
+    return getattr(type(obj), name).raw(obj)
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def sidecar_directory(filepath: str) -> str:
+    """Folder holding the sidecars of the character file at filepath."""
+    return os.path.join(os.path.dirname(os.path.abspath(filepath)), SIDECAR_DIRNAME)
+
+
+def _is_long(value) -> bool:
+    return type(value) is SidecarText or len(value) > SIDECAR_THRESHOLD
+
+
+def _digest_of(value) -> str:
+    return value.digest if type(value) is SidecarText else text_digest(value)
+
+
+def file_form(data: dict) -> dict:
+    """to_dict() data as saved to a file: long text replaced by its hash
+    under REFS_KEY. Loaded and unloaded text give the same result, so this
+    is also the form content hashes are taken of. Writes nothing."""
+    refs = {}
+    for name in SIDECAR_FIELDS:
+        value = data.get(name)
+        if value is not None and _is_long(value):
+            refs[name] = _digest_of(value)
+    if not refs:
+        return data
+    saved = {key: value for key, value in data.items() if key not in refs}
+    saved[REFS_KEY] = refs
+    return saved
+
+
+def save_texts(data: dict, directory: str, durability: Optional[str] = None) -> dict:
+    """Write the sidecars for to_dict() data into directory and return
+    its file_form(). Sidecars already on disk are left alone."""
+    for name in SIDECAR_FIELDS:
+        value = data.get(name)
+        if value is None or not _is_long(value):
+            continue
+        path = os.path.join(directory, _digest_of(value) + SIDECAR_EXTENSION)
+        if os.path.exists(path):
+            continue
+        if type(value) is SidecarText and not os.path.exists(value.path):
+            continue  # Missing since it was loaded; only the reference is saved
+        text = value.read() if type(value) is SidecarText else value
+        os.makedirs(directory, exist_ok=True)
+        atomic_write(path, text.encode("utf-8", "surrogatepass"), durability)
+    return file_form(data)
+
+
+def attach(obj, data: dict, directory: str):
+    """Point the sidecar fields named in saved data at their files.
+    Missing files are attached all the same, so saving keeps the reference
+    instead of dropping the text; see missing_texts()."""
+    refs = data.get(REFS_KEY)
+    if not refs:
+        return
+    if type(refs) is not dict:
+        raise CharacterSchemaError(f"{REFS_KEY}: expected a mapping, got {refs!r}")
+    for name, digest in refs.items():
+        if (name not in SIDECAR_FIELDS or type(digest) is not str or
+                not _DIGEST_PATTERN.fullmatch(digest)):
+            raise CharacterSchemaError(f"{REFS_KEY}.{name}: not a text reference")
+        setattr(obj, name, SidecarText(os.path.join(directory, digest + SIDECAR_EXTENSION),
+                                       digest))
+
+
+def missing_texts(obj) -> list:
+    """Paths of the sidecar files obj refers to that don't exist."""
+    missing = []
+    for name in SIDECAR_FIELDS:
+        value = raw_text(obj, name)
+        if type(value) is SidecarText and not os.path.exists(value.path):
+            missing.append(value.path)
+    return missing
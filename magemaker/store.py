@@ -0,0 +1,507 @@
+"""
+Character storage backends
+
+A store maps opaque string keys to characters and lists their summaries.
+FileStore keeps one .M20/.M20b file per character (the key is the path);
+SQLiteStore keeps everything in a single database with indexed summary
+columns and a normalized trait table, optionally mirroring each character
+to a Markdown .M20 file.
+"""
+
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+from .character import Character, SUMMARY_FIELDS
+from .roster import RosterIndex, CHARACTER_EXTENSIONS
+from . import canonical, fileio, sidecar
+
+
+DATABASE_FILENAME = "characters.sqlite3"
+MIRROR_DIRNAME = "markdown"
+SCHEMA_VERSION = 1
+
+# meta row recording that the directory's files were imported into a new
+# database, so emptying the database later doesn't import them again
+FILES_IMPORTED_KEY = "files_imported"
+
+# Character dict fields stored as rows of the traits table
+TRAIT_FIELDS = (
+    ("attribute", "attributes"),
+    ("ability", "abilities"),
+    ("sphere", "spheres"),
+    ("background", "backgrounds"),
+)
+TRAIT_TYPES = tuple(trait_type for trait_type, _ in TRAIT_FIELDS)
+
+# Single-value traits, stored as trait rows under their own name
+CORE_TRAITS = ("arete", "willpower", "quintessence", "paradox")
+
+# Summary columns that can be filtered on with query()
+QUERY_COLUMNS = ("name", "player", "chronicle", "faction", "group", "creation_mode")
+
+
+def safe_filename(name: str) -> str:
+    """Reduce a character name to a filename-safe stem."""
+    safe_name = "".join(c for c in name if c.isalnum() or c in " -_").strip()
+    return safe_name or "New Character"
+
+
+def _modified_timestamp(modified_date: str) -> float:
+    try:
+        return datetime.fromisoformat(modified_date).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CharacterStore(ABC):
+    """Interface shared by the storage backends.
+    Entries are dicts with "key", "modified" (seconds since the epoch)
+    and the CharacterSummary fields."""
+    
+    # Directory to watch for outside changes, or None to poll()
+    directory: Optional[str] = None
+    
+    @abstractmethod
+    def new_key(self, character: Character) -> str:
+        """Pick the key a character that was never saved will be stored under."""
+    
+    @abstractmethod
+    def load(self, key: str) -> Character:
+        """Load the character stored under key."""
+    
+    @abstractmethod
+    def save(self, character: Character, key: str, durability: Optional[str] = None,
+             force: bool = False) -> bool:
+        """Store character under key. Returns False if nothing changed."""
+    
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove the character stored under key."""
+    
+    @abstractmethod
+    def refresh(self) -> list:
+        """Get every entry, rescanning the backing storage."""
+    
+    @abstractmethod
+    def poll(self) -> tuple[list, list]:
+        """Report changes made behind the store's back since the last scan.
+        Returns (updated entries, removed keys)."""
+    
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[dict]:
+        """Get the current entry for key, or None if it no longer exists."""
+    
+    @abstractmethod
+    def query(self, traits: Optional[dict] = None, min_experience: Optional[int] = None,
+              **columns) -> list:
+        """Find entries by summary column and minimum trait ratings.
+        traits maps (trait_type, name) to a minimum rating, e.g.
+        query(faction="Technocratic Union", traits={("sphere", "Forces"): 3})."""
+    
+    def flush(self):
+        """Write out cached state that get_entry() and delete() only update
+        in memory. May run on a worker thread."""
+    
+    def close(self):
+        self.flush()
+
+
+def _check_query_columns(columns: dict):
+    for column in columns:
+        if column not in QUERY_COLUMNS:
+            raise ValueError(f"Cannot query on {column!r}")
+
+
+class FileStore(CharacterStore):
+    """One character file per key, listed through the roster index.
+    Queries on traits have to load every candidate file."""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.roster = RosterIndex(directory)
+    
+    def _entry(self, roster_entry: dict) -> dict:
+        entry = {key: roster_entry[key] for key in SUMMARY_FIELDS if key in roster_entry}
+        entry["key"] = roster_entry["path"]
+        entry["modified"] = roster_entry.get("mtime", 0) / 1e9
+        return entry
+    
+    def new_key(self, character: Character) -> str:
+        return os.path.join(self.directory, f"{safe_filename(character.name)}.M20")
+    
+    def load(self, key: str) -> Character:
+        return Character.load(key)
+    
+    def save(self, character: Character, key: str, durability: Optional[str] = None,
+             force: bool = False) -> bool:
+        return character.save(key, durability, force)
+    
+    def delete(self, key: str):
+        try:
+            os.unlink(key)
+        except FileNotFoundError:
+            pass
+        self.roster.remove_path(key)
+    
+    def refresh(self) -> list:
+        return [self._entry(entry) for entry in self.roster.refresh()]
+    
+    def poll(self) -> tuple[list, list]:
+        updated, removed = self.roster.poll()
+        return [self._entry(entry) for entry in updated], removed
+    
+    def flush(self):
+        self.roster.save()
+    
+    def get_entry(self, key: str) -> Optional[dict]:
+        # Temp files and indexes share the directory; they are never entries
+        if not key.endswith(CHARACTER_EXTENSIONS):
+            return None
+        entry = self.roster.update_path(key)
+        return self._entry(entry) if entry is not None else None
+    
+    def query(self, traits: Optional[dict] = None, min_experience: Optional[int] = None,
+              **columns) -> list:
+        _check_query_columns(columns)
+        results = []
+        for entry in self.refresh():
+            if min_experience is not None and entry.get("experience_total", 0) < min_experience:
+                continue
+            if traits or any(column not in entry for column in columns):
+                character = self.load(entry["key"])
+                data = character.to_dict()
+                if not _matches_traits(data, traits or {}):
+                    continue
+            else:
+                data = entry
+            if all(data.get(column) == value for column, value in columns.items()):
+                results.append(entry)
+        return results
+
+
+def _matches_traits(data: dict, traits: dict) -> bool:
+    fields = dict(TRAIT_FIELDS)
+    for (trait_type, name), minimum in traits.items():
+        if trait_type in fields:
+            rating = data.get(fields[trait_type], {}).get(name, 0)
+        else:
+            rating = data.get(trait_type, 0)
+        if rating < minimum:
+            return False
+    return True
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS characters (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    player TEXT NOT NULL DEFAULT '',
+    chronicle TEXT NOT NULL DEFAULT '',
+    concept TEXT NOT NULL DEFAULT '',
+    faction TEXT NOT NULL DEFAULT '',
+    "group" TEXT NOT NULL DEFAULT '',
+    creation_mode TEXT NOT NULL DEFAULT 'creation',
+    arete INTEGER NOT NULL DEFAULT 1,
+    experience_total INTEGER NOT NULL DEFAULT 0,
+    experience_spent INTEGER NOT NULL DEFAULT 0,
+    modified_date TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL,
+    mirror_path TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS characters_name ON characters (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS characters_player ON characters (player, chronicle);
+CREATE INDEX IF NOT EXISTS characters_faction ON characters (faction, "group");
+CREATE INDEX IF NOT EXISTS characters_mode ON characters (creation_mode);
+CREATE INDEX IF NOT EXISTS characters_experience
+    ON characters (experience_total, experience_spent);
+CREATE TABLE IF NOT EXISTS traits (
+    character_id INTEGER NOT NULL REFERENCES characters (id) ON DELETE CASCADE,
+    trait_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    PRIMARY KEY (character_id, trait_type, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS traits_rating ON traits (trait_type, name, rating);
+"""
+
+# SQLite synchronous level matching each fileio durability mode. NORMAL in
+# WAL mode only syncs at checkpoints, much like batched fsyncs.
+_SYNCHRONOUS = {
+    fileio.DURABILITY_NONE: "OFF",
+    fileio.DURABILITY_FSYNC: "FULL",
+    fileio.DURABILITY_BATCHED: "NORMAL",
+}
+
+_ENTRY_COLUMNS = ("key",) + SUMMARY_FIELDS
+_ENTRY_SELECT = ", ".join(f'"{column}"' for column in _ENTRY_COLUMNS)
+
+
+class SQLiteStore(CharacterStore):
+    """All characters in one SQLite database.
+    Keys are generated ids. When mirror_directory is set, every save also
+    writes a Markdown .M20 copy there for reading or sharing."""
+    
+    def __init__(self, path: str, mirror_directory: Optional[str] = None):
+        self.path = path
+        self.mirror_directory = mirror_directory
+        if mirror_directory:
+            os.makedirs(mirror_directory, exist_ok=True)
+        
+        # The connection is shared by the GTK thread and the I/O worker
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute(
+            f"PRAGMA synchronous = {_SYNCHRONOUS[fileio.get_durability()]}")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)",
+                               (str(SCHEMA_VERSION),))
+        
+        self._seen = {}  # key -> content_hash, for poll()
+        self._data_version = None
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM characters LIMIT 1").fetchone() is None
+    
+    def get_meta(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = ?",
+                                     (name,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, name: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, value))
+    
+    def new_key(self, character: Character) -> str:
+        return uuid.uuid4().hex
+    
+    def load(self, key: str) -> Character:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, content_hash FROM characters WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"No character stored under {key!r}")
+        character = Character.from_dict(canonical.loads(row[0]))
+        character.mark_saved(row[1], None)
+        return character
+    
+    def save(self, character: Character, key: str, durability: Optional[str] = None,
+             force: bool = False, keep_modified_date: bool = False) -> bool:
+        """Store character under key, plus its Markdown mirror if enabled.
+        durability only applies to the mirror file; the database follows
+        the synchronous level chosen when it was opened. keep_modified_date
+        stores the character's own modified_date instead of the time now."""
+        data = character.to_dict()
+        content_hash = character.content_hash(data)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, content_hash, mirror_path FROM characters WHERE key = ?",
+                (key,)).fetchone()
+            if not force and row is not None and row[1] == content_hash:
+                character.mark_saved(content_hash, None)
+                return False
+            
+            if not keep_modified_date:
+                character.modified_date = data["modified_date"] = datetime.now().isoformat()
+            mirror_path = self._mirror_path(character, key)
+            
+            with self._conn:
+                character_id = self._write_row(
+                    row[0] if row else None, key, data, character.to_json(data),
+                    content_hash, mirror_path)
+                self._write_traits(character_id, data)
+            self._seen[key] = content_hash
+        
+        if mirror_path:
+            fileio.atomic_write(mirror_path, character.to_markdown(content_hash, data),
+                                durability)
+            old_mirror = row[2] if row else None
+            if old_mirror and old_mirror != mirror_path:
+                # Renamed; drop the copy under the old name
+                try:
+                    os.unlink(old_mirror)
+                except FileNotFoundError:
+                    pass
+        
+        character.mark_saved(content_hash, None)
+        return True
+    
+    def _mirror_path(self, character: Character, key: str) -> Optional[str]:
+        if not self.mirror_directory:
+            return None
+        # The key suffix keeps characters with the same name apart
+        filename = f"{safe_filename(character.name)}-{key[:8]}.M20"
+        return os.path.join(self.mirror_directory, filename)
+    
+    def _write_row(self, character_id: Optional[int], key: str, data: dict,
+                   data_json: bytes, content_hash: str, mirror_path: Optional[str]) -> int:
+        columns = {column: data.get(column) for column in
+                   ("name", "player", "chronicle", "concept", "faction", "group",
+                    "creation_mode", "arete", "experience_total", "experience_spent",
+                    "modified_date")}
+        columns["content_hash"] = content_hash
+        columns["mirror_path"] = mirror_path
+        columns["data"] = data_json.decode("utf-8")
+        
+        names = ", ".join(f'"{column}"' for column in columns)
+        if character_id is None:
+            placeholders = ", ".join("?" for _ in columns)
+            cursor = self._conn.execute(
+                f"INSERT INTO characters (key, {names}) VALUES (?, {placeholders})",
+                (key, *columns.values()))
+            return cursor.lastrowid
+        
+        assignments = ", ".join(f'"{column}" = ?' for column in columns)
+        self._conn.execute(f"UPDATE characters SET {assignments} WHERE id = ?",
+                           (*columns.values(), character_id))
+        return character_id
+    
+    def _write_traits(self, character_id: int, data: dict):
+        rows = []
+        for trait_type, field_name in TRAIT_FIELDS:
+            for name, rating in (data.get(field_name) or {}).items():
+                if type(rating) is int and rating > 0:
+                    rows.append((character_id, trait_type, name, rating))
+        for name in CORE_TRAITS:
+            rating = data.get(name)
+            if type(rating) is int:
+                rows.append((character_id, name, name, rating))
+        
+        self._conn.execute("DELETE FROM traits WHERE character_id = ?", (character_id,))
+        self._conn.executemany("INSERT INTO traits VALUES (?, ?, ?, ?)", rows)
+    
+    def delete(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mirror_path FROM characters WHERE key = ?", (key,)).fetchone()
+            with self._conn:
+                self._conn.execute("DELETE FROM characters WHERE key = ?", (key,))
+            self._seen.pop(key, None)
+        if row and row[0]:
+            try:
+                os.unlink(row[0])
+            except FileNotFoundError:
+                pass
+    
+    def import_files(self, paths) -> int:
+        """Copy existing .M20/.M20b files into the database.
+        Returns the number of characters imported."""
+        count = 0
+        for path in paths:
+            try:
+                character = Character.load(path)
+            except Exception:
+                continue  # Left on disk for the user to sort out
+            if sidecar.missing_texts(character):
+                continue  # The database can't keep the reference; same as above
+            # Keep the file's modified date so "last modified" order survives
+            self.save(character, self.new_key(character), force=True,
+                      keep_modified_date=True)
+            count += 1
+        return count
+    
+    def _entry(self, row) -> dict:
+        entry = dict(zip(_ENTRY_COLUMNS, row))
+        entry["modified"] = _modified_timestamp(entry["modified_date"])
+        return entry
+    
+    def _select(self, where: str = "", params=()) -> list:
+        return self._conn.execute(
+            f"SELECT {_ENTRY_SELECT} FROM characters {where} ORDER BY name COLLATE NOCASE, key",
+            params).fetchall()
+    
+    def refresh(self) -> list:
+        with self._lock:
+            entries = [self._entry(row) for row in self._select()]
+            self._seen = {entry["key"]: entry["content_hash"] for entry in entries}
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return entries
+    
+    def poll(self) -> tuple[list, list]:
+        with self._lock:
+            # data_version only moves when another connection commits
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return [], []
+            self._data_version = data_version
+            
+            current = dict(self._conn.execute("SELECT key, content_hash FROM characters"))
+            changed = [key for key, content_hash in current.items()
+                       if self._seen.get(key) != content_hash]
+            removed = [key for key in self._seen if key not in current]
+            self._seen = current
+            
+            updated = []
+            for key in changed:
+                updated.extend(self._entry(row) for row in self._select("WHERE key = ?", (key,)))
+        return updated, removed
+    
+    def get_entry(self, key: str) -> Optional[dict]:
+        with self._lock:
+            rows = self._select("WHERE key = ?", (key,))
+        return self._entry(rows[0]) if rows else None
+    
+    def query(self, traits: Optional[dict] = None, min_experience: Optional[int] = None,
+              **columns) -> list:
+        _check_query_columns(columns)
+        conditions = []
+        params = []
+        for column, value in columns.items():
+            conditions.append(f'"{column}" = ?')
+            params.append(value)
+        if min_experience is not None:
+            conditions.append("experience_total >= ?")
+            params.append(min_experience)
+        for (trait_type, name), minimum in (traits or {}).items():
+            conditions.append(
+                "id IN (SELECT character_id FROM traits "
+                "WHERE trait_type = ? AND name = ? AND rating >= ?)")
+            params.extend((trait_type, name, minimum))
+        
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        with self._lock:
+            return [self._entry(row) for row in self._select(where, params)]
+
+
+def open_store(directory: str, backend: Optional[str] = None,
+               mirror: bool = False) -> CharacterStore:
+    """Open the character store for a save directory.
+    backend is "files" (default) or "sqlite". A new SQLite database
+    imports the character files already in the directory, once; with
+    mirror set it keeps Markdown copies in a subdirectory of it."""
+    if backend in (None, "", "files"):
+        return FileStore(directory)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown store backend: {backend}")
+    
+    os.makedirs(directory, exist_ok=True)
+    store = SQLiteStore(os.path.join(directory, DATABASE_FILENAME),
+                        mirror_directory=os.path.join(directory, MIRROR_DIRNAME)
+                        if mirror else None)
+    if store.get_meta(FILES_IMPORTED_KEY) is None:
+        # Databases from before the marker count as imported unless empty
+        if store.is_empty():
+            existing = [entry["key"] for entry in FileStore(directory).refresh()]
+            store.import_files(existing)
+        store.set_meta(FILES_IMPORTED_KEY, datetime.now().isoformat())
+    return store
+
@@ -0,0 +1,37 @@
+"""
+Interned trait ids derived from the tables in data.py
+
+Each tuple fixes the position (id) of every trait of one kind. Ids are
+stored in compact save formats, so new traits must only ever be appended
+to the data tables, never inserted or reordered.
+"""
+
+from .data import ATTRIBUTES, PRIMARY_ABILITIES, SECONDARY_ABILITIES, SPHERES, BACKGROUNDS
+
+
+ATTRIBUTE_IDS = tuple(attr for attrs in ATTRIBUTES.values() for attr in attrs)
+
+ABILITY_IDS = tuple(
+    [ability for abilities in PRIMARY_ABILITIES.values() for ability in abilities] +
+    [ability for abilities in SECONDARY_ABILITIES.values() for ability in abilities]
+)
+
+SPHERE_IDS = tuple(SPHERES)
+
+BACKGROUND_IDS = tuple(bg[0] for bgs in BACKGROUNDS.values() for bg in bgs)
+
+# Reverse lookups: trait name -> id
+ATTRIBUTE_INDEX = {name: i for i, name in enumerate(ATTRIBUTE_IDS)}
+ABILITY_INDEX = {name: i for i, name in enumerate(ABILITY_IDS)}
+SPHERE_INDEX = {name: i for i, name in enumerate(SPHERE_IDS)}
+BACKGROUND_INDEX = {name: i for i, name in enumerate(BACKGROUND_IDS)}
+
+# Trait name -> (category, tier) for attributes and abilities, where tier
+# is "attribute", "primary" or "secondary"
+TRAIT_CATEGORIES = {}
+for _tier, _table in (("attribute", ATTRIBUTES), ("primary", PRIMARY_ABILITIES),
+                      ("secondary", SECONDARY_ABILITIES)):
+    for _category, _names in _table.items():
+        for _name in _names:
+            TRAIT_CATEGORIES.setdefault(_name, (_category, _tier))
+del _tier, _table, _category, _names, _name
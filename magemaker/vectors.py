@@ -0,0 +1,352 @@
+"""
+Compact dict-like storage for trait ratings
+
+Each vector keeps one signed byte per trait id from traits.py instead of a
+per-character dict keyed by name strings. They behave like the dicts they
+replace (get, items, del, ==, ...) and iterate in id order. Names outside
+the id table, or values that don't fit a byte, go to a small overflow dict
+so nothing is ever lost.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+from typing import Optional
+from .traits import (
+    ATTRIBUTE_IDS, ABILITY_IDS, SPHERE_IDS, BACKGROUND_IDS,
+    ATTRIBUTE_INDEX, ABILITY_INDEX, SPHERE_INDEX, BACKGROUND_INDEX,
+)
+
+
+ABSENT = -128  # array slot for a trait the mapping doesn't contain
+
+HEALTH_LEVEL_IDS = ("Bruised", "Hurt", "Injured", "Wounded", "Mauled",
+                    "Crippled", "Incapacitated")
+HEALTH_LEVEL_INDEX = {name: i for i, name in enumerate(HEALTH_LEVEL_IDS)}
+
+_MISSING = object()
+
+
+class TraitVector(MutableMapping):
+    """Trait name -> rating mapping backed by a fixed-width array.
+    Subclasses set IDS and INDEX."""
+    
+    __slots__ = ("_values", "_extra")
+    
+    IDS = ()
+    INDEX = {}
+    
+    def __init__(self, ratings=()):
+        self._values = array("b", [ABSENT]) * len(self.IDS)
+        self._extra = None  # overflow dict, created on first use
+        if not ratings:
+            return
+        if type(ratings) is not dict:
+            self.update(ratings)
+            return
+        # Loading a save: fill the array directly, skipping __setitem__
+        values, index = self._values, self.INDEX
+        for name, value in ratings.items():
+            i = index.get(name)
+            packed = self._pack(value) if i is not None else None
+            if packed is not None:
+                values[i] = packed
+            else:
+                self[name] = value
+    
+    @classmethod
+    def filled(cls, value: int) -> 'TraitVector':
+        """A vector holding every known trait at value."""
+        vector = cls.__new__(cls)
+        vector._values = array("b", [value]) * len(cls.IDS)
+        vector._extra = None
+        return vector
+    
+    def _pack(self, value):
+        """Array representation of value, or None if it needs the overflow dict."""
+        if type(value) is int and ABSENT < value <= 127:
+            return value
+        return None
+    
+    def _unpack(self, stored: int):
+        return stored
+    
+    def __getitem__(self, name):
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+    
+    def get(self, name, default=None):
+        i = self.INDEX.get(name)
+        if i is not None:
+            stored = self._values[i]
+            if stored != ABSENT:
+                return self._unpack(stored)
+        if self._extra:
+            return self._extra.get(name, default)
+        return default
+    
+    def __setitem__(self, name, value):
+        i = self.INDEX.get(name)
+        packed = self._pack(value)
+        if i is not None and packed is not None:
+            self._values[i] = packed
+            if self._extra:
+                self._extra.pop(name, None)
+            return
+        if i is not None:
+            self._values[i] = ABSENT
+        if self._extra is None:
+            self._extra = {}
+        self._extra[name] = value
+    
+    def __delitem__(self, name):
+        i = self.INDEX.get(name)
+        if i is not None and self._values[i] != ABSENT:
+            self._values[i] = ABSENT
+            return
+        if not self._extra or name not in self._extra:
+            raise KeyError(name)
+        del self._extra[name]
+    
+    def __contains__(self, name):
+        return self.get(name, _MISSING) is not _MISSING
+    
+    def __iter__(self):
+        for name, stored in zip(self.IDS, self._values):
+            if stored != ABSENT:
+                yield name
+        if self._extra:
+            yield from list(self._extra)
+    
+    def __len__(self):
+        return len(self._values) - self._values.count(ABSENT) + len(self._extra or ())
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+    
+    def __copy__(self):
+        vector = type(self)()
+        vector._values = array("b", self._values)
+        vector._extra = dict(self._extra) if self._extra else None
+        return vector
+    
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+    
+    def copy(self) -> 'TraitVector':
+        return self.__copy__()
+    
+    def fingerprint(self) -> tuple:
+        """Immutable snapshot of the contents, cheap to build and compare."""
+        return (self._values.tobytes(), tuple(self._extra.items()) if self._extra else ())
+    
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class AttributeRatings(TraitVector):
+    __slots__ = ()
+    IDS = ATTRIBUTE_IDS
+    INDEX = ATTRIBUTE_INDEX
+
+
+class AbilityRatings(TraitVector):
+    __slots__ = ()
+    IDS = ABILITY_IDS
+    INDEX = ABILITY_INDEX
+
+
+class SphereRatings(TraitVector):
+    __slots__ = ()
+    IDS = SPHERE_IDS
+    INDEX = SPHERE_INDEX
+
+
+class BackgroundRatings(TraitVector):
+    __slots__ = ()
+    IDS = BACKGROUND_IDS
+    INDEX = BACKGROUND_INDEX
+
+
+class HealthLevels(TraitVector):
+    """Health level name -> marked (bool)."""
+    
+    __slots__ = ()
+    IDS = HEALTH_LEVEL_IDS
+    INDEX = HEALTH_LEVEL_INDEX
+    
+    def _pack(self, value):
+        if type(value) is bool:
+            return int(value)
+        return None
+    
+    def _unpack(self, stored: int):
+        return bool(stored)
+
+
+# Baseline layout: trait type -> (first slot, id table, name -> id), one
+# slot per id
+BASELINE_LAYOUT = {}
+_slot = 0
+for _trait_type, _ids, _index in (("attribute", ATTRIBUTE_IDS, ATTRIBUTE_INDEX),
+                                  ("ability", ABILITY_IDS, ABILITY_INDEX),
+                                  ("sphere", SPHERE_IDS, SPHERE_INDEX),
+                                  ("background", BACKGROUND_IDS, BACKGROUND_INDEX)):
+    BASELINE_LAYOUT[_trait_type] = (_slot, _ids, _index)
+    _slot += len(_ids)
+BASELINE_SIZE = _slot
+del _slot, _trait_type, _ids, _index
+
+# Core trait keys older versions snapshotted into baselines. They were
+# never used as minimums (core traits have none), so loading drops them.
+LEGACY_CORE_KEYS = frozenset(("arete", "willpower", "quintessence"))
+
+
+class Baseline:
+    """Minimum ratings carried over from an earlier creation mode.
+    
+    One signed byte per slot of BASELINE_LAYOUT, plus an overflow dict keyed
+    "trait_type:name" for anything else. layered() shares the storage with
+    its source until either side changes a value (copy-on-write), so a
+    freebie layer that mostly repeats the creation layer costs nothing extra.
+    
+    Saved as {"attribute": [ratings in id order, null = none], ...}. The
+    older flat {"attribute:Strength": 3, "arete": 3} form is read as well,
+    without its LEGACY_CORE_KEYS.
+    """
+    
+    __slots__ = ("_values", "_extra", "_shared")
+    
+    def __init__(self, data=None):
+        self._values = array("b", [ABSENT]) * BASELINE_SIZE
+        self._extra = None
+        self._shared = False
+        for key, value in (data or {}).items():
+            layout = BASELINE_LAYOUT.get(key)
+            if key in LEGACY_CORE_KEYS:
+                continue
+            if layout is not None and isinstance(value, list):
+                first, ids, _ = layout
+                for i, (name, rating) in enumerate(zip(ids, value), first):
+                    if type(rating) is int and ABSENT < rating <= 127:
+                        self._values[i] = rating
+                    elif rating is not None:
+                        self.set(key, name, rating)
+            elif layout is not None:
+                self.set(key, key, value)
+            else:
+                trait_type, _, name = key.partition(":")
+                self.set(trait_type, name, value)
+    
+    @classmethod
+    def from_data(cls, data: dict) -> 'Baseline':
+        """Baseline(data) for saved data, refusing anything that isn't a
+        rating. Raises ValueError(key, expected, got) for the first bad
+        entry, with key None when the key itself is wrong."""
+        baseline = cls()
+        values = baseline._values
+        for key, value in data.items():
+            layout = BASELINE_LAYOUT.get(key)
+            if layout is not None:
+                first, ids, _ = layout
+                if type(value) is not list or len(value) > len(ids):
+                    raise ValueError(key, f"a list of at most {len(ids)} ratings", value)
+                # One array conversion checks the whole list
+                try:
+                    ratings = array("b", [ABSENT if rating is None else rating
+                                          for rating in value])
+                except (TypeError, OverflowError):
+                    raise ValueError(key, "a list of ratings or nulls", value) from None
+                values[first:first + len(ratings)] = ratings
+            elif type(key) is not str or (":" not in key and key not in LEGACY_CORE_KEYS):
+                raise ValueError(None, 'trait types or "type:name" keys', key)
+            elif type(value) is not int:
+                raise ValueError(key, "a whole number", value)
+            elif key not in LEGACY_CORE_KEYS:
+                trait_type, _, name = key.partition(":")
+                baseline.set(trait_type, name, value)
+        return baseline
+    
+    def _slot(self, trait_type: str, trait_name: str) -> Optional[int]:
+        layout = BASELINE_LAYOUT.get(trait_type)
+        if layout is None:
+            return None
+        first, _, index = layout
+        i = index.get(trait_name)
+        return None if i is None else first + i
+    
+    def get(self, trait_type: str, trait_name: str, default=None):
+        """Baseline rating of a trait, or default if it has none."""
+        slot = self._slot(trait_type, trait_name)
+        if slot is not None:
+            stored = self._values[slot]
+            if stored != ABSENT:
+                return stored
+        if self._extra:
+            return self._extra.get(f"{trait_type}:{trait_name}", default)
+        return default
+    
+    def set(self, trait_type: str, trait_name: str, value):
+        """Set a baseline rating, copying shared storage first if needed."""
+        if self.get(trait_type, trait_name) == value:
+            return
+        if self._shared:
+            self._values = array("b", self._values)
+            self._extra = dict(self._extra) if self._extra else None
+            self._shared = False
+        
+        slot = self._slot(trait_type, trait_name)
+        if slot is not None and type(value) is int and ABSENT < value <= 127:
+            self._values[slot] = value
+            if self._extra:
+                self._extra.pop(f"{trait_type}:{trait_name}", None)
+            return
+        if slot is not None:
+            self._values[slot] = ABSENT
+        if self._extra is None:
+            self._extra = {}
+        self._extra[f"{trait_type}:{trait_name}"] = value
+    
+    def layered(self) -> 'Baseline':
+        """A new baseline starting from this one's values, sharing storage."""
+        layer = Baseline()
+        layer._values = self._values
+        layer._extra = self._extra
+        # Either side copies before its next write
+        layer._shared = self._shared = True
+        return layer
+    
+    def to_data(self) -> dict:
+        """Compact JSON-ready form (see the class docstring)."""
+        data = {}
+        for trait_type, (first, ids, _) in BASELINE_LAYOUT.items():
+            ratings = [None if stored == ABSENT else stored
+                       for stored in self._values[first:first + len(ids)]]
+            while ratings and ratings[-1] is None:
+                ratings.pop()
+            if ratings:
+                data[trait_type] = ratings
+        if self._extra:
+            data.update(self._extra)
+        return data
+    
+    def __bool__(self):
+        return self._values.count(ABSENT) != BASELINE_SIZE or bool(self._extra)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Baseline):
+            return NotImplemented
+        return self._values == other._values and (self._extra or {}) == (other._extra or {})
+    
+    def __repr__(self):
+        return f"Baseline({self.to_data()!r})"
+    
+    def __copy__(self):
+        return self.layered()
+    
+    def __deepcopy__(self, memo):
+        return self.layered()
+    
+    def __reduce__(self):
+        return (Baseline, (self.to_data(),))